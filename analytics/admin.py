@@ -0,0 +1,11 @@
+from django.contrib import admin
+
+from .models import DailyViews
+
+
+@admin.register(DailyViews)
+class DailyViewsAdmin(admin.ModelAdmin):
+    list_display = ('model_label', 'object_id', 'day', 'hits', 'uniques')
+    list_filter = ('model_label', 'day')
+    exclude = ('sketch',)
+    readonly_fields = ('model_label', 'object_id', 'day', 'hits', 'uniques')
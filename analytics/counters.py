@@ -0,0 +1,307 @@
+"""
+Buffered view counters.
+
+Page views are recorded in the cache instead of hitting the database on
+every request, then folded into the model's counter column by a periodic
+flush that issues a handful of ``UPDATE ... SET views_count = views_count + n``
+statements. Every process flushes the objects it recorded from a background
+thread every VIEW_COUNT_FLUSH_INTERVAL seconds and once more at exit.
+
+``UniqueViewCounter`` counts unique viewers per object per day instead:
+viewers are added to an in-memory HyperLogLog sketch, and each flush merges
+the sketches into ``DailyViews`` rows and adds the growth of the unique
+estimate to the counter column. No per-viewer state is kept anywhere.
+"""
+
+import atexit
+import hashlib
+import logging
+import threading
+import time
+from collections import defaultdict
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.db import DatabaseError, close_old_connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .hyperloglog import HyperLogLog
+
+logger = logging.getLogger(__name__)
+
+DEDUP_WINDOW = getattr(settings, 'VIEW_COUNT_DEDUP_WINDOW', 60 * 30)
+
+# Cache alias holding the pending counts; it must not cull entries (see CACHES)
+VIEW_COUNT_CACHE = getattr(settings, 'VIEW_COUNT_CACHE', 'default')
+
+# Pending counters never expire on their own; a flush only brings them back to zero
+PENDING_TIMEOUT = None
+
+
+def get_viewer_key(request):
+    """Identify the viewer for de-duplication: user, then session, then IP"""
+    if request.user.is_authenticated:
+        ident = f'user:{request.user.pk}'
+    elif request.session.session_key:
+        ident = f'session:{request.session.session_key}'
+    else:
+        ident = f'ip:{request.META.get("REMOTE_ADDR", "")}'
+    return hashlib.md5(ident.encode()).hexdigest()
+
+
+class ViewCounter:
+    """
+    Buffers view increments for one model and flushes them in batches.
+
+    The counts live in the VIEW_COUNT_CACHE alias and are only touched with
+    atomic operations (add/incr/decr), so processes sharing that cache can
+    record and flush concurrently: a flush takes exactly what it read back
+    out with decr(), and increments made in the meantime stay for the next
+    flush. Which objects have views pending is remembered in process memory,
+    not in the cache where it could be evicted, so each process flushes the
+    objects it recorded. This needs a backend whose incr/decr are atomic
+    (local memory, Memcached, Redis), and an alias large enough that pending
+    counts are never culled.
+    """
+
+    def __init__(self, model_label, field='views_count'):
+        self.model_label = model_label
+        self.field = field
+        self.prefix = f'viewcount:{model_label}'
+        self._pks = set()
+        self._lock = threading.Lock()
+
+    @property
+    def model(self):
+        return apps.get_model(self.model_label)
+
+    @property
+    def store(self):
+        return caches[VIEW_COUNT_CACHE]
+
+    def _pending_key(self, pk):
+        return f'{self.prefix}:pending:{pk}'
+
+    def record(self, pk, request=None):
+        """
+        Count a view of object ``pk``. Repeat views by the same viewer
+        within the de-duplication window are ignored. Returns True if
+        the view was counted.
+        """
+        if request is not None:
+            seen_key = f'{self.prefix}:seen:{pk}:{get_viewer_key(request)}'
+            if not cache.add(seen_key, 1, DEDUP_WINDOW):
+                return False
+
+        pending_key = self._pending_key(pk)
+        if not self.store.add(pending_key, 1, PENDING_TIMEOUT):
+            try:
+                self.store.incr(pending_key)
+            except ValueError:
+                # Evicted between add() and incr()
+                self.store.add(pending_key, 1, PENDING_TIMEOUT)
+        with self._lock:
+            self._pks.add(pk)
+
+        _ensure_flusher()
+        return True
+
+    def pending(self, pk):
+        """Number of buffered views for ``pk`` not yet written to the database"""
+        return self.store.get(self._pending_key(pk), 0)
+
+    def flush(self):
+        """Write buffered counts to the database. Returns the number of views flushed."""
+        with self._lock:
+            pks, self._pks = self._pks, set()
+        if not pks:
+            return 0
+        pending_keys = {self._pending_key(pk): pk for pk in pks}
+
+        store = self.store
+        taken = {}
+        for key, n in store.get_many(pending_keys.keys()).items():
+            if not n:
+                continue
+            try:
+                # Take out only what was read, concurrent increments survive
+                store.decr(key, n)
+            except ValueError:
+                continue
+            taken[key] = n
+
+        # Group objects by increment so each distinct n costs one UPDATE
+        by_increment = defaultdict(list)
+        for key, n in taken.items():
+            by_increment[n].append(pending_keys[key])
+
+        model = self.model
+        try:
+            with transaction.atomic():
+                for n, ids in by_increment.items():
+                    model.objects.filter(pk__in=ids).update(**{self.field: F(self.field) + n})
+        except Exception:
+            # Put the counts back for the next flush
+            for key, n in taken.items():
+                try:
+                    store.incr(key, n)
+                except ValueError:
+                    store.add(key, n, PENDING_TIMEOUT)
+            with self._lock:
+                self._pks |= pks
+            raise
+
+        return sum(taken.values())
+
+
+class UniqueViewCounter:
+    """
+    Counts unique viewers per object and day with HyperLogLog sketches,
+    buffered in process memory and flushed in batches like ViewCounter.
+    """
+
+    def __init__(self, model_label, field='views_count'):
+        self.model_label = model_label
+        self.field = field
+        self._buffer = {}  # (pk, day) -> [sketch, hits]
+        self._lock = threading.Lock()
+
+    @property
+    def model(self):
+        return apps.get_model(self.model_label)
+
+    def record(self, pk, request):
+        """Count a view of object ``pk``; repeat viewers on the same day only count once"""
+        viewer = get_viewer_key(request)
+        key = (pk, timezone.localdate())
+        with self._lock:
+            entry = self._buffer.get(key)
+            if entry is None:
+                entry = self._buffer[key] = [HyperLogLog(), 0]
+            entry[0].add(viewer)
+            entry[1] += 1
+
+        _ensure_flusher()
+        return True
+
+    def pending(self, pk):
+        """Number of buffered hits for ``pk`` not yet written to the database"""
+        with self._lock:
+            return sum(hits for (key_pk, _), (_, hits) in self._buffer.items() if key_pk == pk)
+
+    def flush(self):
+        """Merge buffered sketches into DailyViews. Returns the number of hits flushed."""
+        with self._lock:
+            buffered, self._buffer = self._buffer, {}
+        if not buffered:
+            return 0
+
+        try:
+            failed = self._write(buffered)
+        except Exception:
+            # Nothing was committed, keep every sketch for the next flush
+            self._restore(buffered)
+            raise
+        self._restore(failed)
+        return sum(hits for key, (_, hits) in buffered.items() if key not in failed)
+
+    def _write(self, buffered):
+        """Write the buffered sketches, returns the entries that could not be written"""
+        from .models import DailyViews
+
+        growth = defaultdict(int)
+        failed = {}
+        with transaction.atomic():
+            for (pk, day), (sketch, hits) in buffered.items():
+                try:
+                    # One savepoint per row, a failing row doesn't discard the others
+                    with transaction.atomic():
+                        uniques = sketch.count()
+                        # get_or_create absorbs a concurrent insert of the same row
+                        row, created = DailyViews.objects.select_for_update().get_or_create(
+                            model_label=self.model_label, object_id=pk, day=day,
+                            defaults={'hits': hits, 'uniques': uniques, 'sketch': sketch.to_bytes()},
+                        )
+                        if not created:
+                            merged = HyperLogLog.from_bytes(row.sketch).merge(sketch)
+                            uniques = max(merged.count(), row.uniques)
+                            DailyViews.objects.filter(pk=row.pk).update(
+                                hits=F('hits') + hits, uniques=uniques, sketch=merged.to_bytes(),
+                            )
+                            uniques -= row.uniques
+                except DatabaseError:
+                    logger.exception(f'Failed to flush unique views of {self.model_label} {pk} for {day}')
+                    failed[(pk, day)] = (sketch, hits)
+                    continue
+                growth[pk] += uniques
+
+            # Group objects by increment so each distinct n costs one UPDATE
+            by_increment = defaultdict(list)
+            for pk, n in growth.items():
+                if n:
+                    by_increment[n].append(pk)
+            model = self.model
+            for n, ids in by_increment.items():
+                model.objects.filter(pk__in=ids).update(**{self.field: F(self.field) + n})
+        return failed
+
+    def _restore(self, entries):
+        """Merge entries taken out by a failed flush back into the buffer"""
+        with self._lock:
+            for key, (sketch, hits) in entries.items():
+                entry = self._buffer.get(key)
+                if entry is None:
+                    self._buffer[key] = [sketch, hits]
+                else:
+                    entry[0].merge(sketch)
+                    entry[1] += hits
+
+
+course_views = ViewCounter('courses.Course')
+topic_views = UniqueViewCounter('forums.Topic')
+
+COUNTERS = [course_views, topic_views]
+
+
+def flush_all():
+    """Flush every registered counter, returns the total number of views written"""
+    total = 0
+    for counter in COUNTERS:
+        try:
+            total += counter.flush()
+        except Exception:
+            logger.exception(f'Failed to flush view counts for {counter.model_label}')
+    return total
+
+
+_flusher = None
+_flusher_lock = threading.Lock()
+
+
+def _flush_interval():
+    return getattr(settings, 'VIEW_COUNT_FLUSH_INTERVAL', 30)
+
+
+def _flush_loop():
+    while True:
+        time.sleep(_flush_interval())
+        flush_all()
+        close_old_connections()
+
+
+def _ensure_flusher():
+    """
+    Start the background flush thread the first time a view is recorded.
+    Nothing is started when VIEW_COUNT_FLUSH_INTERVAL is 0 (the test settings
+    do this), buffers are then only written by an explicit flush.
+    """
+    global _flusher
+    if _flusher is not None or not _flush_interval():
+        return
+    with _flusher_lock:
+        if _flusher is None:
+            _flusher = threading.Thread(target=_flush_loop, name='view-count-flusher', daemon=True)
+            _flusher.start()
+            atexit.register(flush_all)
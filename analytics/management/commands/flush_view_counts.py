@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from analytics.counters import flush_all
+
+
+class Command(BaseCommand):
+    help = 'Write buffered course and topic view counts to the database'
+
+    def handle(self, *args, **options):
+        flushed = flush_all()
+        self.stdout.write(self.style.SUCCESS(f'Flushed {flushed} views'))
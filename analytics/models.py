@@ -0,0 +1,22 @@
+from django.db import models
+
+
+class DailyViews(models.Model):
+    """
+    Page views of one object on one day: the raw hit count, plus a
+    HyperLogLog sketch of the viewers and the unique viewer estimate
+    derived from it. Written by analytics.counters.UniqueViewCounter.
+    """
+    model_label = models.CharField(max_length=100)
+    object_id = models.PositiveBigIntegerField()
+    day = models.DateField()
+    hits = models.PositiveIntegerField(default=0)
+    uniques = models.PositiveIntegerField(default=0)
+    sketch = models.BinaryField()
+
+    class Meta:
+        unique_together = ('model_label', 'object_id', 'day')
+        verbose_name_plural = 'daily views'
+
+    def __str__(self):
+        return f"{self.model_label} #{self.object_id} on {self.day}: {self.uniques} unique"
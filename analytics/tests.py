@@ -0,0 +1,142 @@
+from django.contrib.auth.models import AnonymousUser, User
+from django.core.cache import cache, caches
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+
+from courses.models import Category, Course
+from forums.models import Category as ForumCategory, Topic
+
+from .counters import VIEW_COUNT_CACHE, UniqueViewCounter, ViewCounter
+from .hyperloglog import HyperLogLog
+from .models import DailyViews
+
+
+class FakeSession:
+    session_key = None
+
+
+def anonymous_request(ip):
+    request = RequestFactory().get('/', REMOTE_ADDR=ip)
+    request.user = AnonymousUser()
+    request.session = FakeSession()
+    return request
+
+
+def viewer_ips(count):
+    return [f'10.0.{i // 250}.{i % 250 + 1}' for i in range(count)]
+
+
+class ViewCounterTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        caches[VIEW_COUNT_CACHE].clear()
+        author = User.objects.create_user('author')
+        category = Category.objects.create(name='Category')
+        self.course = Course.objects.create(
+            title='Course', author=author, category=category, description='About', content='Text',
+        )
+        self.counter = ViewCounter('courses.Course')
+
+    def test_flush_writes_every_viewer(self):
+        # More distinct viewers than a default-sized cache holds entries
+        for ip in viewer_ips(401):
+            self.assertTrue(self.counter.record(self.course.pk, anonymous_request(ip)))
+        self.assertFalse(self.counter.record(self.course.pk, anonymous_request(viewer_ips(1)[0])))
+        self.assertEqual(self.counter.pending(self.course.pk), 401)
+
+        self.assertEqual(self.counter.flush(), 401)
+        self.course.refresh_from_db()
+        self.assertEqual(self.course.views_count, 401)
+        self.assertEqual(self.counter.pending(self.course.pk), 0)
+        self.assertEqual(self.counter.flush(), 0)
+
+    @override_settings(CACHES={
+        'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'OPTIONS': {'MAX_ENTRIES': 50}},
+        VIEW_COUNT_CACHE: {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'counts'},
+    })
+    def test_culled_dedup_keys_dont_lose_counts(self):
+        for ip in viewer_ips(120):
+            self.counter.record(self.course.pk, anonymous_request(ip))
+        self.assertEqual(self.counter.flush(), 120)
+        self.course.refresh_from_db()
+        self.assertEqual(self.course.views_count, 120)
+
+    def test_failed_flush_keeps_the_counts(self):
+        for ip in viewer_ips(3):
+            self.counter.record(self.course.pk, anonymous_request(ip))
+        broken = ViewCounter('courses.Course', field='no_such_field')
+        broken._pks = set(self.counter._pks)
+        with self.assertRaises(Exception):
+            broken.flush()
+        self.assertEqual(self.counter.pending(self.course.pk), 3)
+        self.assertEqual(self.counter.flush(), 3)
+
+
+class HyperLogLogTests(SimpleTestCase):
+    def sketch(self, items):
+        sketch = HyperLogLog()
+        for item in items:
+            sketch.add(f'viewer-{item}')
+        return sketch
+
+    def test_error_bound(self):
+        # Three standard errors of the default precision
+        bound = 3 * 1.04 / (2 ** 11) ** 0.5
+        for n in (100, 1000, 20000):
+            estimate = self.sketch(range(n)).count()
+            self.assertLessEqual(abs(estimate - n) / n, bound, f'{estimate} for {n} items')
+
+    def test_repeats_dont_count(self):
+        self.assertEqual(self.sketch(list(range(50)) * 20).count(), self.sketch(range(50)).count())
+
+    def test_merge(self):
+        merged = self.sketch(range(0, 6000)).merge(self.sketch(range(4000, 10000)))
+        # The same registers as one sketch that saw every item
+        self.assertEqual(merged.registers, self.sketch(range(10000)).registers)
+        self.assertEqual(HyperLogLog.from_bytes(merged.to_bytes()).count(), merged.count())
+        with self.assertRaises(ValueError):
+            merged.merge(HyperLogLog(precision=10))
+
+
+class UniqueViewCounterTests(TestCase):
+    def setUp(self):
+        author = User.objects.create_user('author')
+        category = ForumCategory.objects.create(name='General')
+        self.topic = Topic.objects.create(title='Hello', category=category, author=author)
+        self.counter = UniqueViewCounter('forums.Topic')
+
+    def view(self, ips):
+        for ip in ips:
+            self.counter.record(self.topic.pk, anonymous_request(ip))
+
+    def test_flush_writes_daily_views(self):
+        ips = viewer_ips(200)
+        self.view(ips + ips[:50])
+        self.assertEqual(self.counter.pending(self.topic.pk), 250)
+        self.assertEqual(self.counter.flush(), 250)
+        self.assertEqual(self.counter.pending(self.topic.pk), 0)
+
+        row = DailyViews.objects.get(model_label='forums.Topic', object_id=self.topic.pk, day=timezone.localdate())
+        self.assertEqual(row.hits, 250)
+        self.assertAlmostEqual(row.uniques, 200, delta=10)
+        self.topic.refresh_from_db()
+        self.assertEqual(self.topic.views_count, row.uniques)
+
+        # A later flush merges into the same row and only adds the growth
+        self.view(viewer_ips(300))
+        self.assertEqual(self.counter.flush(), 300)
+        row.refresh_from_db()
+        self.assertEqual(row.hits, 550)
+        self.assertAlmostEqual(row.uniques, 300, delta=15)
+        self.assertEqual(HyperLogLog.from_bytes(row.sketch).count(), row.uniques)
+        self.topic.refresh_from_db()
+        self.assertEqual(self.topic.views_count, row.uniques)
+
+    def test_failed_flush_keeps_the_sketches(self):
+        self.view(viewer_ips(20))
+        broken = UniqueViewCounter('forums.Topic', field='no_such_field')
+        broken._buffer = self.counter._buffer
+        with self.assertRaises(Exception):
+            broken.flush()
+        self.assertEqual(broken.pending(self.topic.pk), 20)
+        self.assertFalse(DailyViews.objects.exists())
@@ -1,6 +1,7 @@
 from django.contrib import admin
 from django.utils.html import format_html
 from django.utils import timezone
+from django.db.models import Count
 from .models import Category, Course, Section, Rating, CourseIssue, IssueComment, CourseEnrollment, CourseReport
 
 class SectionInline(admin.TabularInline):
@@ -38,9 +39,13 @@ class CategoryAdmin(admin.ModelAdmin):
     prepopulated_fields = {'slug': ('name',)}
     search_fields = ('name', 'description')
     
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(num_courses=Count('courses'))
+    
     def course_count(self, obj):
-        return obj.courses.count()
+        return obj.num_courses
     course_count.short_description = 'Courses'
+    course_count.admin_order_field = 'num_courses'
 
 @admin.register(Course)
 class CourseAdmin(admin.ModelAdmin):
@@ -48,7 +53,7 @@ class CourseAdmin(admin.ModelAdmin):
     list_filter = ('status', 'level', 'category', 'is_featured')
     search_fields = ('title', 'description', 'author__username')
     prepopulated_fields = {'slug': ('title',)}
-    readonly_fields = ('views_count', 'created_at', 'updated_at', 'published_at')
+    readonly_fields = ('views_count', 'rating_count', 'avg_rating', 'enrollment_count', 'created_at', 'updated_at', 'published_at')
     autocomplete_fields = ['author', 'category']
     date_hierarchy = 'created_at'
     inlines = [SectionInline, RatingInline, IssueInline, EnrollmentInline]
@@ -60,18 +65,14 @@ class CourseAdmin(admin.ModelAdmin):
             'fields': ('status', 'level', 'prerequisites', 'estimated_duration', 'is_featured')
         }),
         ('Statistics', {
-            'fields': ('views_count', 'created_at', 'updated_at', 'published_at'),
+            'fields': ('views_count', 'rating_count', 'avg_rating', 'enrollment_count', 'created_at', 'updated_at', 'published_at'),
             'classes': ('collapse',),
         }),
     )
     
-    def enrollment_count(self, obj):
-        return obj.enrollments.count()
-    enrollment_count.short_description = 'Enrollments'
-    
     def rating_display(self, obj):
-        avg_rating = obj.get_average_rating()
-        rating_count = obj.ratings.count()
+        avg_rating = obj.avg_rating
+        rating_count = obj.rating_count
         
         if rating_count == 0:
             return 'No ratings'
@@ -88,6 +89,7 @@ class CourseAdmin(admin.ModelAdmin):
         return format_html('{} ({} ratings)', stars, rating_count)
     
     rating_display.short_description = 'Rating'
+    rating_display.admin_order_field = 'avg_rating'
 
 @admin.register(Section)
 class SectionAdmin(admin.ModelAdmin):
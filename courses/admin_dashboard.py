@@ -1,9 +1,9 @@
 from django.contrib import admin
 from django.utils.translation import gettext_lazy as _
-from django.db.models import Avg
 from django.urls import reverse
 
-from .models import Course, CourseReport, CourseIssue, CourseEnrollment
+from .models import CourseReport
+from .stats import course_stats
 
 class CoursesAdminDashboard(admin.AdminSite):
     """Custom admin dashboard for courses app"""
@@ -29,20 +29,8 @@ class CoursesAdminDashboard(admin.AdminSite):
         """
         Override the index view to add course stats.
         """
-        # Get course statistics
-        course_stats = {
-            'total': Course.objects.count(),
-            'published': Course.objects.filter(status='published').count(),
-            'draft': Course.objects.filter(status='draft').count(),
-            'moderated': Course.objects.filter(status='moderated').count(),
-            'archived': Course.objects.filter(status='archived').count(),
-            'avg_rating': Course.objects.filter(ratings__isnull=False).annotate(
-                avg_rating=Avg('ratings__score')).aggregate(Avg('avg_rating'))['avg_rating__avg'] or 0,
-            'total_enrollments': CourseEnrollment.objects.count(),
-            'total_issues': CourseIssue.objects.count(),
-            'open_issues': CourseIssue.objects.filter(status='open').count(),
-            'pending_reports': CourseReport.objects.filter(status='pending').count(),
-        }
+        # Cached, see courses/stats.py
+        stats = course_stats()
         
         # Create links to pending reports
         pending_reports = CourseReport.objects.filter(status='pending').select_related('course', 'reporter')[:5]
@@ -60,7 +48,7 @@ class CoursesAdminDashboard(admin.AdminSite):
         
         extra_context = extra_context or {}
         extra_context.update({
-            'course_stats': course_stats,
+            'course_stats': stats,
             'pending_reports': pending_reports_display,
         })
         
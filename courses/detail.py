@@ -0,0 +1,78 @@
+"""
+Data for the course detail page.
+
+The page is built from a fixed set of queries, however many ratings or
+enrollments the course has:
+
+* the course with its author and category, with the visitor's enrollment
+  and rating state annotated on the same row
+* the sections
+* the first page of ratings with their users
+* the precomputed related courses
+
+Rating and enrollment totals are read from the denormalized Course columns
+instead of being counted. Further ratings are served by the course_reviews
+view, addressed by keyset cursors over (created_at, id) so that every page
+costs one indexed query however deep it is.
+"""
+
+from django.db.models import Exists, OuterRef, Subquery
+from django.shortcuts import get_object_or_404
+
+from nxgen.keyset import decode_cursor, encode_cursor, seek_after
+from recommendations import engine as recommendations
+
+from .models import Course, CourseEnrollment, Rating
+
+RATINGS_PER_PAGE = 10
+
+
+def reviews_page(course_id, cursor=None, limit=RATINGS_PER_PAGE):
+    """
+    Ratings of a course, newest first, following ``cursor`` (an encoded
+    cursor, invalid ones start from the top). Returns the ratings and the
+    cursor of the next page, or None on the last page.
+    """
+    ratings = Rating.objects.filter(course_id=course_id).select_related('user').order_by('-created_at', '-id')
+    position = decode_cursor(cursor)
+    if position:
+        ratings = seek_after(ratings, position)
+    page = list(ratings[:limit + 1])
+    next_cursor = encode_cursor(page[limit - 1]) if len(page) > limit else None
+    return page[:limit], next_cursor
+
+
+def course_queryset(user):
+    """Published courses, annotated with the state of ``user`` when signed in"""
+    courses = Course.objects.filter(status='published').select_related('author', 'category')
+    if user.is_authenticated:
+        enrollment = CourseEnrollment.objects.filter(course=OuterRef('pk'), user=user)
+        courses = courses.annotate(
+            # NULL when the user is not enrolled
+            enrollment_completed=Subquery(enrollment.values('completed')[:1]),
+            has_rated=Exists(Rating.objects.filter(course=OuterRef('pk'), user=user)),
+        )
+    return courses
+
+
+def load_course_detail(request, slug):
+    """Context for courses/course_detail.html"""
+    course = get_object_or_404(course_queryset(request.user), slug=slug)
+    enrollment_completed = getattr(course, 'enrollment_completed', None)
+    # Without JavaScript, "Older reviews" reloads the page further down the list
+    ratings, next_cursor = reviews_page(course.pk, request.GET.get('reviews'))
+
+    return {
+        'course': course,
+        'sections': course.sections.order_by('order'),
+        'is_enrolled': enrollment_completed is not None,
+        'is_completed': bool(enrollment_completed),
+        'has_rated': getattr(course, 'has_rated', False),
+        'avg_rating': course.avg_rating,
+        'rating_count': course.rating_count,
+        'enrollment_count': course.enrollment_count,
+        'ratings': ratings,
+        'next_cursor': next_cursor,
+        # Related courses are precomputed by the recommendations app
+        'related_courses': recommendations.related_courses(course),
+    }
@@ -0,0 +1,83 @@
+import time
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+
+from courses.models import Category, Course, CourseEnrollment, Rating
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed a course with many ratings and enrollments and time its detail page, anonymous and signed in. '
+        'Everything is written in one transaction that is rolled back at the end.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--ratings', type=int, default=10_000)
+        parser.add_argument('--enrollments', type=int, default=3_000)
+        parser.add_argument('--runs', type=int, default=10, help='Timed requests per visitor')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            started = time.perf_counter()
+            course = self.seed(options['ratings'], options['enrollments'])
+            self.stdout.write(
+                f"Seeded {options['ratings']} ratings and {options['enrollments']} enrollments "
+                f"in {time.perf_counter() - started:.1f}s"
+            )
+
+            url = course.get_absolute_url()
+            self.stdout.write(f'anonymous: {self.time_page(Client(), url, options["runs"])}')
+            client = Client()
+            client.force_login(User.objects.get(username=f'{course.slug}-viewer'))
+            self.stdout.write(f'signed in: {self.time_page(client, url, options["runs"])}')
+
+            transaction.set_rollback(True)
+        cache.clear()
+        self.stdout.write(self.style.SUCCESS('Done, seeded data rolled back'))
+
+    def seed(self, ratings, enrollments, batch_size=2000):
+        """Bulk insert the course's raters, bypassing the per-row signals, then set its counters"""
+        stamp = time.time_ns()
+        author = User.objects.create(username=f'course-benchmark-{stamp}')
+        course = Course.objects.create(
+            title=f'Course benchmark {stamp}', author=author,
+            category=Category.objects.create(name=f'Course benchmark {stamp}'),
+            description='A course with a lot of reviews', content='# Content', status='published',
+        )
+        User.objects.create(username=f'{course.slug}-viewer')
+        users = User.objects.bulk_create(
+            [User(username=f'{course.slug}-{i}') for i in range(max(ratings, enrollments))], batch_size=batch_size,
+        )
+        Rating.objects.bulk_create(
+            [Rating(course=course, user=user, score=i % 5 + 1, comment='Useful') for i, user in enumerate(users[:ratings])],
+            batch_size=batch_size,
+        )
+        CourseEnrollment.objects.bulk_create(
+            [CourseEnrollment(course=course, user=user) for user in users[:enrollments]], batch_size=batch_size,
+        )
+        rating_sum = sum(i % 5 + 1 for i in range(ratings))
+        Course.objects.filter(pk=course.pk).update(
+            rating_count=ratings, rating_sum=rating_sum, avg_rating=rating_sum / max(ratings, 1),
+            enrollment_count=enrollments,
+        )
+        return course
+
+    def time_page(self, client, url, runs):
+        """Queries, median time and size of the page, with the page cache cleared before each request"""
+        timings = []
+        for _ in range(runs):
+            cache.clear()
+            with CaptureQueriesContext(connection) as queries:
+                started = time.perf_counter()
+                response = client.get(url)
+                timings.append(time.perf_counter() - started)
+        timings.sort()
+        return (
+            f'{response.status_code}, {len(queries)} queries, median {timings[len(timings) // 2] * 1000:.1f}ms, '
+            f'{len(response.content) / 1024:.0f} KB over {runs} runs'
+        )
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, OuterRef, Subquery, IntegerField
+from django.db.models.functions import Coalesce
+
+from courses.models import Course, CourseEnrollment
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the denormalized enrollment_count column on Course'
+
+    def handle(self, *args, **options):
+        enrollments = (
+            CourseEnrollment.objects.filter(course=OuterRef('pk'))
+            .values('course')
+            .annotate(total=Count('id'))
+            .values('total')
+        )
+        updated = Course.objects.update(
+            enrollment_count=Coalesce(Subquery(enrollments, output_field=IntegerField()), 0)
+        )
+        self.stdout.write(self.style.SUCCESS(f'Recounted enrollments for {updated} courses'))
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Avg, Count, OuterRef, Subquery, Sum, IntegerField, FloatField
+from django.db.models.functions import Coalesce
+
+from courses.models import Course, Rating
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the denormalized rating_sum/rating_count/avg_rating columns on Course'
+
+    def handle(self, *args, **options):
+        ratings = Rating.objects.filter(course=OuterRef('pk')).values('course')
+        updated = Course.objects.update(
+            rating_sum=Coalesce(
+                Subquery(ratings.annotate(total=Sum('score')).values('total'), output_field=IntegerField()), 0
+            ),
+            rating_count=Coalesce(
+                Subquery(ratings.annotate(total=Count('id')).values('total'), output_field=IntegerField()), 0
+            ),
+            avg_rating=Coalesce(
+                Subquery(ratings.annotate(avg=Avg('score')).values('avg'), output_field=FloatField()), 0.0
+            ),
+        )
+        self.stdout.write(self.style.SUCCESS(f'Recounted ratings for {updated} courses'))
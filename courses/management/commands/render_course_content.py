@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+
+from courses.models import Course, Section
+from courses.rendering import content_hash, render_markdown
+
+
+class Command(BaseCommand):
+    help = 'Pre-render the markdown content of every course and section into content_html'
+    models = (Course, Section)
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true',
+                            help='Re-render everything, even if the stored HTML is up to date')
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        for model in self.models:
+            rendered = self.render_all(model, options['force'], options['batch_size'])
+            self.stdout.write(f'{model._meta.verbose_name_plural}: rendered {rendered}')
+        self.stdout.write(self.style.SUCCESS('Done'))
+
+    def render_all(self, model, force, batch_size):
+        batch = []
+        rendered = 0
+        queryset = model.objects.only('pk', 'content', 'content_html', 'content_hash')
+        for obj in queryset.iterator(chunk_size=batch_size):
+            digest = content_hash(obj.content)
+            if not force and digest == obj.content_hash and obj.content_html:
+                continue
+            obj.content_html = render_markdown(obj.content, digest)
+            obj.content_hash = digest
+            batch.append(obj)
+            if len(batch) >= batch_size:
+                rendered += model.objects.bulk_update(batch, ['content_html', 'content_hash'])
+                batch = []
+        if batch:
+            rendered += model.objects.bulk_update(batch, ['content_html', 'content_hash'])
+        return rendered
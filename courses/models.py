@@ -1,11 +1,15 @@
 from django.db import models
 from django.contrib.auth.models import User
 from django.urls import reverse
-from django.utils.text import slugify
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.utils import timezone
 
-class Category(models.Model):
+from nxgen.counters import protect_counters
+from nxgen.slugs import UniqueSlugMixin
+
+from .rendering import refresh_rendered_content
+
+class Category(UniqueSlugMixin, models.Model):
     name = models.CharField(max_length=100)
     slug = models.SlugField(unique=True)
     description = models.TextField(blank=True)
@@ -20,13 +24,10 @@ class Category(models.Model):
     def get_absolute_url(self):
         return reverse('courses:category_detail', kwargs={'slug': self.slug})
     
-    def save(self, *args, **kwargs):
-        if not self.slug:
-            self.slug = slugify(self.name)
-        super().save(*args, **kwargs)
+    slug_source = 'name'
 
 
-class Course(models.Model):
+class Course(UniqueSlugMixin, models.Model):
     STATUS_CHOICES = (
         ('draft', 'Draft'),
         ('published', 'Published'),
@@ -46,6 +47,8 @@ class Course(models.Model):
     category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name='courses')
     description = models.TextField()
     content = models.TextField()  # This will store the main course content in markdown
+    content_html = models.TextField(blank=True, editable=False)  # Sanitized render of content
+    content_hash = models.CharField(max_length=40, blank=True, editable=False)
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='draft')
     level = models.CharField(max_length=12, choices=LEVEL_CHOICES, default='beginner')
     created_at = models.DateTimeField(auto_now_add=True)
@@ -57,6 +60,16 @@ class Course(models.Model):
     is_featured = models.BooleanField(default=False)
     views_count = models.PositiveIntegerField(default=0)
     
+    # Denormalized rating aggregates, kept in sync by the Rating signals
+    rating_sum = models.PositiveIntegerField(default=0)
+    rating_count = models.PositiveIntegerField(default=0)
+    avg_rating = models.FloatField(default=0)
+    
+    # Kept in sync by the CourseEnrollment signals
+    enrollment_count = models.PositiveIntegerField(default=0)
+    
+    COUNTER_FIELDS = ('views_count', 'rating_sum', 'rating_count', 'avg_rating', 'enrollment_count')
+    
     class Meta:
         ordering = ['-created_at']
     
@@ -67,26 +80,24 @@ class Course(models.Model):
         return reverse('courses:course_detail', kwargs={'slug': self.slug})
     
     def save(self, *args, **kwargs):
-        if not self.slug:
-            self.slug = slugify(self.title)
-        
         # If course is being published for the first time
         if self.status == 'published' and not self.published_at:
             self.published_at = timezone.now()
-            
+        
+        kwargs = protect_counters(self, self.COUNTER_FIELDS, kwargs)
+        kwargs['update_fields'] = refresh_rendered_content(self, kwargs.get('update_fields'))
         super().save(*args, **kwargs)
 
     def get_average_rating(self):
-        ratings = self.ratings.all()
-        if ratings:
-            return sum(rating.score for rating in ratings) / len(ratings)
-        return 0
+        return self.avg_rating
 
 
 class Section(models.Model):
     course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='sections')
     title = models.CharField(max_length=200)
     content = models.TextField()
+    content_html = models.TextField(blank=True, editable=False)
+    content_hash = models.CharField(max_length=40, blank=True, editable=False)
     order = models.PositiveIntegerField(default=0)
     
     class Meta:
@@ -94,6 +105,10 @@ class Section(models.Model):
     
     def __str__(self):
         return f"{self.course.title} - {self.title}"
+    
+    def save(self, *args, **kwargs):
+        kwargs['update_fields'] = refresh_rendered_content(self, kwargs.get('update_fields'))
+        super().save(*args, **kwargs)
 
 
 class Rating(models.Model):
@@ -105,6 +120,9 @@ class Rating(models.Model):
     
     class Meta:
         unique_together = ['course', 'user']  # A user can rate a course only once
+        indexes = [
+            models.Index(fields=['course', '-created_at', '-id']),  # Newest reviews of a course
+        ]
     
     def __str__(self):
         return f"{self.user.username}: {self.score} for {self.course.title}"
@@ -203,3 +221,37 @@ class CourseReport(models.Model):
     
     def __str__(self):
         return f"Report on {self.course.title} - {self.get_reason_display()}"
+
+
+class CourseStats(models.Model):
+    """
+    Single row of site-wide counters for the admin dashboard, kept current
+    by courses.signals so the dashboard doesn't COUNT these tables.
+    """
+    total_enrollments = models.PositiveIntegerField(default=0)
+    total_issues = models.PositiveIntegerField(default=0)
+    open_issues = models.PositiveIntegerField(default=0)
+    pending_reports = models.PositiveIntegerField(default=0)
+    
+    class Meta:
+        verbose_name_plural = "course stats"
+    
+    def __str__(self):
+        return "Course statistics"
+    
+    @classmethod
+    def get(cls):
+        stats = cls.objects.filter(pk=1).first()
+        return stats if stats is not None else cls.recount()
+    
+    @classmethod
+    def recount(cls):
+        """Rebuild the counters from the underlying tables"""
+        issues = CourseIssue.objects.aggregate(total=models.Count('pk'), open=models.Count('pk', filter=models.Q(status='open')))
+        stats, _ = cls.objects.update_or_create(pk=1, defaults={
+            'total_enrollments': CourseEnrollment.objects.count(),
+            'total_issues': issues['total'],
+            'open_issues': issues['open'],
+            'pending_reports': CourseReport.objects.filter(status='pending').count(),
+        })
+        return stats
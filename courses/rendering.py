@@ -0,0 +1,95 @@
+"""
+Markdown rendering for course content.
+
+Rendering goes through the full Markdown pipeline (codehilite, toc, tables...)
+followed by bleach sanitizing, which is expensive for long course bodies.
+The sanitized HTML is persisted on Course/Section by their save() methods,
+and ``render_markdown`` memoizes results in a small LRU keyed by a hash of
+the source so unchanged text is never rendered twice by the same process.
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+
+import bleach
+import markdown
+
+ALLOWED_TAGS = list(bleach.sanitizer.ALLOWED_TAGS) + [
+    'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'pre', 'code', 'blockquote',
+    'hr', 'table', 'thead', 'tbody', 'th', 'tr', 'td', 'img'
+]
+
+ALLOWED_ATTRIBUTES = dict(bleach.sanitizer.ALLOWED_ATTRIBUTES)
+ALLOWED_ATTRIBUTES.update({
+    'img': ['src', 'alt', 'title', 'width', 'height', 'class'],
+    'a': ['href', 'title', 'target', 'rel'],
+    'code': ['class'],
+    'pre': ['class'],
+    'th': ['scope', 'colspan', 'rowspan', 'align'],
+    'td': ['colspan', 'rowspan', 'align'],
+})
+
+MARKDOWN_EXTENSIONS = [
+    'markdown.extensions.fenced_code',
+    'markdown.extensions.tables',
+    'markdown.extensions.nl2br',
+    'markdown.extensions.sane_lists',
+    'markdown.extensions.toc',
+    'markdown.extensions.codehilite',
+]
+
+CACHE_SIZE = 256
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def content_hash(text):
+    """Stable hash of markdown source, used to detect changes"""
+    return hashlib.sha1((text or '').encode('utf-8')).hexdigest()
+
+
+def _render(text):
+    html = markdown.markdown(text, extensions=MARKDOWN_EXTENSIONS)
+    return bleach.clean(html, tags=ALLOWED_TAGS, attributes=ALLOWED_ATTRIBUTES, strip=True)
+
+
+def render_markdown(text, digest=None):
+    """Convert markdown to sanitized HTML, reusing earlier results for identical text"""
+    if not text:
+        return ''
+
+    digest = digest or content_hash(text)
+    with _cache_lock:
+        if digest in _cache:
+            _cache.move_to_end(digest)
+            return _cache[digest]
+
+    html = _render(text)
+
+    with _cache_lock:
+        _cache[digest] = html
+        _cache.move_to_end(digest)
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    return html
+
+
+def refresh_rendered_content(instance, update_fields=None):
+    """
+    Re-render ``instance.content`` into ``content_html`` if the source changed
+    since it was last rendered. Returns the update_fields to pass on to save().
+    """
+    if update_fields is not None and 'content' not in update_fields:
+        return update_fields
+
+    digest = content_hash(instance.content)
+    if digest == instance.content_hash and instance.content_html:
+        return update_fields
+
+    instance.content_html = render_markdown(instance.content, digest)
+    instance.content_hash = digest
+    if update_fields is not None:
+        update_fields = set(update_fields) | {'content_html', 'content_hash'}
+    return update_fields
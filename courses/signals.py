@@ -1,30 +1,104 @@
-from django.db.models.signals import post_save, post_delete
+from django.db.models import Case, F, FloatField, Value, When
+from django.db.models.functions import Cast
+from django.db.models.signals import post_init, post_save, post_delete
 from django.dispatch import receiver
-from django.utils.text import slugify
 
-from .models import Course, Section, Rating, CourseIssue, CourseReport
+from nxgen.pagecache import invalidate_tags
 
-@receiver(post_save, sender=Course)
-def ensure_unique_course_slug(sender, instance, created, **kwargs):
-    """Ensure course slugs are unique by appending a number if needed"""
-    if created:
-        original_slug = instance.slug
-        counter = 1
-        
-        # Check if the slug already exists (shouldn't happen due to unique constraint, but just to be safe)
-        while Course.objects.filter(slug=instance.slug).exclude(id=instance.id).exists():
-            instance.slug = f"{original_slug}-{counter}"
-            counter += 1
-            
-        if instance.slug != original_slug:
-            # Save the instance with the updated slug, but don't trigger the signal again
-            instance.save(update_fields=['slug'])
+from .models import Category, Course, Section, Rating, CourseIssue, CourseReport, CourseEnrollment, CourseStats
+from .stats import invalidate_course_stats
+
+def _apply_rating_delta(course_id, score_delta, count_delta):
+    """Shift a course's rating aggregates in a single UPDATE statement"""
+    new_sum = F('rating_sum') + score_delta
+    new_count = F('rating_count') + count_delta
+    Course.objects.filter(pk=course_id).update(
+        rating_sum=new_sum,
+        rating_count=new_count,
+        # The right-hand side sees the pre-update row, so the average is
+        # derived from the same shifted expressions
+        avg_rating=Case(
+            When(rating_count__lte=-count_delta, then=Value(0.0)),
+            default=Cast(new_sum, FloatField()) / Cast(new_count, FloatField()),
+            output_field=FloatField(),
+        ),
+    )
+    invalidate_course_stats()
+    invalidate_tags('courses')
+
+@receiver(post_init, sender=Rating)
+def remember_rating_score(sender, instance, **kwargs):
+    """Keep the score as loaded so edits can be applied as a delta"""
+    instance._saved_score = instance.score if instance.pk else None
 
 @receiver(post_save, sender=Rating)
 def update_course_on_rating(sender, instance, created, **kwargs):
-    """Recalculate average rating when a rating is added or modified"""
-    # The average rating is calculated on demand in the model method, so nothing to do here
-    # But we could add other processing if needed, like notifications
+    """Update the course rating aggregates when a rating is added or modified"""
+    if created:
+        _apply_rating_delta(instance.course_id, instance.score, 1)
+    elif instance._saved_score is not None and instance.score != instance._saved_score:
+        _apply_rating_delta(instance.course_id, instance.score - instance._saved_score, 0)
+    instance._saved_score = instance.score
+
+@receiver(post_delete, sender=Rating)
+def update_course_on_rating_delete(sender, instance, **kwargs):
+    """Remove a deleted rating from the course rating aggregates"""
+    _apply_rating_delta(instance.course_id, -instance.score, -1)
+
+def _bump_stats(**deltas):
+    """Shift the dashboard counters in a single UPDATE and drop the cached stats"""
+    deltas = {field: delta for field, delta in deltas.items() if delta}
+    if deltas:
+        updated = CourseStats.objects.filter(pk=1).update(
+            **{field: F(field) + delta for field, delta in deltas.items()}
+        )
+        if not updated:
+            CourseStats.recount()
+    invalidate_course_stats()
+
+@receiver(post_save, sender=Course)
+@receiver(post_delete, sender=Course)
+def invalidate_stats_on_course_change(sender, **kwargs):
+    invalidate_course_stats()
+
+@receiver(post_save, sender=CourseEnrollment)
+def count_enrollment(sender, instance, created, **kwargs):
+    if created:
+        Course.objects.filter(pk=instance.course_id).update(enrollment_count=F('enrollment_count') + 1)
+        _bump_stats(total_enrollments=1)
+
+@receiver(post_delete, sender=CourseEnrollment)
+def uncount_enrollment(sender, instance, **kwargs):
+    Course.objects.filter(pk=instance.course_id, enrollment_count__gt=0).update(
+        enrollment_count=F('enrollment_count') - 1
+    )
+    _bump_stats(total_enrollments=-1)
+
+@receiver(post_init, sender=CourseIssue)
+@receiver(post_init, sender=CourseReport)
+def remember_status(sender, instance, **kwargs):
+    """Keep the status as loaded so the open/pending counters follow changes"""
+    instance._saved_status = instance.status if instance.pk else None
+
+@receiver(post_save, sender=CourseIssue)
+def count_issue(sender, instance, created, **kwargs):
+    was_open = not created and instance._saved_status == 'open'
+    instance._saved_status = instance.status
+    _bump_stats(total_issues=int(created), open_issues=(instance.status == 'open') - was_open)
+
+@receiver(post_delete, sender=CourseIssue)
+def uncount_issue(sender, instance, **kwargs):
+    _bump_stats(total_issues=-1, open_issues=-(instance._saved_status == 'open'))
+
+@receiver(post_save, sender=CourseReport)
+def count_report(sender, instance, created, **kwargs):
+    was_pending = not created and instance._saved_status == 'pending'
+    instance._saved_status = instance.status
+    _bump_stats(pending_reports=(instance.status == 'pending') - was_pending)
+
+@receiver(post_delete, sender=CourseReport)
+def uncount_report(sender, instance, **kwargs):
+    _bump_stats(pending_reports=-(instance._saved_status == 'pending'))
 
 @receiver(post_save, sender=CourseIssue)
 def send_issue_notification(sender, instance, created, **kwargs):
@@ -42,3 +116,11 @@ def handle_course_moderation(sender, instance, **kwargs):
     if instance.status == 'actioned' and instance.course.status != 'moderated':
         instance.course.status = 'moderated'
         instance.course.save(update_fields=['status'])
+
+@receiver(post_save, sender=Course)
+@receiver(post_delete, sender=Course)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_course_pages(sender, **kwargs):
+    """Drop the cached course listing"""
+    invalidate_tags('courses')
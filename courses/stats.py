@@ -0,0 +1,43 @@
+"""
+Course statistics for the admin dashboard and its JSON endpoint.
+
+Course status counts and the average rating come from one conditional
+aggregate over Course, using the denormalized rating columns. The
+enrollment/issue/report counters are read from the CourseStats row. The
+combined result is cached until courses.signals invalidates it.
+"""
+
+from django.core.cache import cache
+from django.db.models import Avg, Count, Q
+
+from .models import Course, CourseStats
+
+STATS_CACHE_KEY = 'courses:admin_stats'
+STATS_TIMEOUT = 60 * 5
+
+
+def course_stats():
+    stats = cache.get(STATS_CACHE_KEY)
+    if stats is None:
+        stats = Course.objects.aggregate(
+            total=Count('pk'),
+            published=Count('pk', filter=Q(status='published')),
+            draft=Count('pk', filter=Q(status='draft')),
+            moderated=Count('pk', filter=Q(status='moderated')),
+            archived=Count('pk', filter=Q(status='archived')),
+            avg_rating=Avg('avg_rating', filter=Q(rating_count__gt=0)),
+        )
+        stats['avg_rating'] = round(stats['avg_rating'] or 0, 2)
+        counters = CourseStats.get()
+        stats.update({
+            'total_enrollments': counters.total_enrollments,
+            'total_issues': counters.total_issues,
+            'open_issues': counters.open_issues,
+            'pending_reports': counters.pending_reports,
+        })
+        cache.set(STATS_CACHE_KEY, stats, STATS_TIMEOUT)
+    return stats
+
+
+def invalidate_course_stats():
+    cache.delete(STATS_CACHE_KEY)
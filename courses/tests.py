@@ -1,3 +1,77 @@
+from django.contrib.auth.models import User
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
 
-# Create your tests here.
+from .detail import reviews_page
+from .models import Category, Course, CourseEnrollment, Rating
+
+
+class AdminChangelistQueryTests(TestCase):
+    """Changelist pages cost the same number of queries however many rows they show"""
+
+    def setUp(self):
+        self.admin = User.objects.create_superuser('admin', 'admin@example.com', 'secret')
+        self.students = [User.objects.create_user(f'student{i}') for i in range(3)]
+        self.client.force_login(self.admin)
+
+    def add_courses(self, count):
+        category = Category.objects.create(name=f'Category {Category.objects.count()}')
+        for i in range(count):
+            course = Course.objects.create(
+                title=f'{category.name} course {i}', author=self.admin, category=category,
+                description='About', content='# Content', status='published',
+            )
+            for score, student in enumerate(self.students, start=3):
+                Rating.objects.create(course=course, user=student, score=score)
+                CourseEnrollment.objects.create(course=course, user=student)
+
+    def assertConstantQueries(self, url, grow):
+        with CaptureQueriesContext(connection) as baseline:
+            self.client.get(url)
+        grow()
+        with self.assertNumQueries(len(baseline)):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_course_changelist(self):
+        self.add_courses(1)
+        response = self.assertConstantQueries(
+            reverse('admin:courses_course_changelist'), lambda: self.add_courses(20),
+        )
+        self.assertEqual(response.context['cl'].result_count, 21)
+        self.assertContains(response, '(3 ratings)', count=21)
+
+    def test_category_changelist(self):
+        self.add_courses(1)
+        response = self.assertConstantQueries(
+            reverse('admin:courses_category_changelist'),
+            lambda: [self.add_courses(2) for _ in range(10)],
+        )
+        self.assertEqual(response.context['cl'].result_count, 11)
+
+
+class ReviewPagingTests(TestCase):
+    def test_cursor_pages(self):
+        author = User.objects.create_user('author')
+        course = Course.objects.create(
+            title='Course', author=author, category=Category.objects.create(name='Category'),
+            description='About', content='# Content', status='published',
+        )
+        for i in range(25):
+            Rating.objects.create(course=course, user=User.objects.create_user(f'reviewer{i}'), score=5)
+        # Ties on created_at must be broken by id
+        Rating.objects.update(created_at=timezone.now())
+
+        seen, cursor = [], None
+        while True:
+            page, cursor = reviews_page(course.pk, cursor)
+            seen.extend(rating.pk for rating in page)
+            if cursor is None:
+                break
+        self.assertEqual(seen, list(course.ratings.order_by('-created_at', '-id').values_list('pk', flat=True)))
+        # A garbled cursor starts from the top
+        self.assertEqual(reviews_page(course.pk, 'garbage')[0][0].pk, seen[0])
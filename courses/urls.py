@@ -7,6 +7,7 @@ urlpatterns = [
     # Course browsing
     path('', views.course_list, name='course_list'),
     path('course/<slug:slug>/', views.course_detail, name='course_detail'),
+    path('course/<slug:slug>/reviews/', views.course_reviews, name='course_reviews'),
     path('course/<slug:slug>/enroll/', views.enroll_course, name='enroll_course'),
     path('course/<slug:slug>/complete/', views.complete_course, name='complete_course'),
     
@@ -31,6 +32,7 @@ urlpatterns = [
     # Moderation
     path('course/<slug:slug>/report/', views.report_course, name='report_course'),
     path('moderation/', views.moderation_queue, name='moderation_queue'),
+    path('moderation/stats/', views.admin_stats, name='admin_stats'),
     path('report/<int:report_id>/review/', views.review_report, name='review_report'),
     path('course/<slug:slug>/restore/', views.restore_course, name='restore_course'),
 ]
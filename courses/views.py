@@ -8,8 +8,12 @@ from django.http import JsonResponse, Http404
 from django.views.decorators.http import require_POST
 from django.contrib.auth.decorators import user_passes_test
 
+from analytics.counters import course_views
+from nxgen.pagecache import cache_page_by_tags
+from .detail import load_course_detail, reviews_page
+from .stats import course_stats
 from .models import (
-    Course, Category, Section, Rating, CourseIssue, 
+    Course, Category, Section, CourseIssue, 
     IssueComment, CourseEnrollment, CourseReport
 )
 from .forms import (
@@ -21,9 +25,10 @@ def is_moderator(user):
     return user.is_staff or user.is_superuser
 
 # Course listing and browsing
+@cache_page_by_tags('courses')
 def course_list(request):
     search_form = CourseSearchForm(request.GET)
-    courses = Course.objects.filter(status='published')
+    courses = Course.objects.filter(status='published').select_related('author')
     
     if search_form.is_valid():
         query = search_form.cleaned_data.get('query')
@@ -37,10 +42,6 @@ def course_list(request):
         if level:
             courses = courses.filter(level=level)
     
-    # Add average rating to each course
-    for course in courses:
-        course.avg_rating = course.get_average_rating()
-    
     # Get categories for the filter
     categories = Category.objects.all()
     
@@ -57,27 +58,14 @@ def course_list(request):
     return render(request, 'courses/course_list.html', context)
 
 def course_detail(request, slug):
-    course = get_object_or_404(Course, slug=slug, status='published')
-    sections = course.sections.all().order_by('order')
-    
-    # Increment view count, this is a bad way though shame on me :)
-    course.views_count += 1
-    course.save(update_fields=['views_count'])
+    context = load_course_detail(request, slug)
+    course = context['course']
     
-    # Check if user is enrolled
-    is_enrolled = False
-    has_rated = False
-    if request.user.is_authenticated:
-        is_enrolled = CourseEnrollment.objects.filter(course=course, user=request.user).exists()
-        has_rated = Rating.objects.filter(course=course, user=request.user).exists()
-    
-    # Get ratings and calculate stats
-    ratings = course.ratings.all()
-    avg_rating = course.get_average_rating()
-    rating_count = ratings.count()
+    # Views are buffered and written to views_count in batches
+    course_views.record(course.pk, request)
     
     # Rating form
-    if request.method == 'POST' and request.user.is_authenticated and not has_rated:
+    if request.method == 'POST' and request.user.is_authenticated and not context['has_rated']:
         rating_form = RatingForm(request.POST)
         if rating_form.is_valid():
             rating = rating_form.save(commit=False)
@@ -89,23 +77,39 @@ def course_detail(request, slug):
     else:
         rating_form = RatingForm()
     
-    # Related courses
-    related_courses = Course.objects.filter(
-        category=course.category, 
-        status='published'
-    ).exclude(id=course.id)[:3]
-    
+    context['rating_form'] = rating_form
+    return render(request, 'courses/course_detail.html', context)
+
+def course_reviews(request, slug):
+    """
+    A page of a course's reviews after the ``after`` cursor, as an HTML
+    fragment for infinite scroll or as JSON when asked for.
+    """
+    course_id = Course.objects.filter(slug=slug, status='published').values_list('pk', flat=True).first()
+    if course_id is None:
+        raise Http404("Course not found")
+    ratings, next_cursor = reviews_page(course_id, request.GET.get('after'))
+    
+    if 'application/json' in request.headers.get('accept', ''):
+        return JsonResponse({
+            'reviews': [
+                {
+                    'id': rating.pk,
+                    'user': rating.user.username,
+                    'score': rating.score,
+                    'comment': rating.comment,
+                    'created_at': rating.created_at.isoformat(),
+                }
+                for rating in ratings
+            ],
+            'next': next_cursor,
+        })
     context = {
-        'course': course,
-        'sections': sections,
-        'is_enrolled': is_enrolled,
-        'has_rated': has_rated,
-        'avg_rating': avg_rating,
-        'rating_count': rating_count,
-        'rating_form': rating_form,
-        'related_courses': related_courses,
+        'course_slug': slug,
+        'ratings': ratings,
+        'next_cursor': next_cursor,
     }
-    return render(request, 'courses/course_detail.html', context)
+    return render(request, 'courses/course_reviews.html', context)
 
 @login_required
 def enroll_course(request, slug):
@@ -417,6 +421,11 @@ def moderation_queue(request):
     }
     return render(request, 'courses/moderation_queue.html', context)
 
+@user_passes_test(is_moderator)
+def admin_stats(request):
+    """Dashboard statistics as JSON, cheap enough to poll"""
+    return JsonResponse(course_stats())
+
 @user_passes_test(is_moderator)
 def review_report(request, report_id):
     report = get_object_or_404(CourseReport, id=report_id)
@@ -7,14 +7,14 @@ from .models import Event, EventCategory, Registration
 
 @admin.register(Event)
 class EventAdmin(admin.ModelAdmin):
-    list_display = ('title', 'start_date', 'end_date', 'status', 'is_virtual', 'created')
+    list_display = ('title', 'start_date', 'end_date', 'status', 'is_virtual', 'confirmed_count', 'capacity', 'created')
     list_filter = ('status', 'is_virtual', 'start_date', 'end_date', 'categories')
     search_fields = ('title', 'description', 'location')
     prepopulated_fields = {'slug': ('title',)}
     ordering = ('-start_date',)
     date_hierarchy = 'start_date'
     filter_horizontal = ('categories', 'organizers')
-    readonly_fields = ('created', 'updated')
+    readonly_fields = ('created', 'updated', 'confirmed_count')
     fieldsets = (
         ('Basic Information', {
             'fields': ('title', 'slug', 'description', 'short_description', 'status')
@@ -26,7 +26,7 @@ class EventAdmin(admin.ModelAdmin):
             'fields': ('location', 'is_virtual', 'virtual_link')
         }),
         ('Additional Info', {
-            'fields': ('image', 'capacity', 'categories', 'organizers')
+            'fields': ('image', 'capacity', 'confirmed_count', 'categories', 'organizers')
         }),
         ('System Info', {
             'fields': ('created', 'updated'),
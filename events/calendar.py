@@ -0,0 +1,167 @@
+"""
+Calendar feed shared by the FullCalendar JSON endpoint and the .ics export.
+
+Only the columns the feed needs are selected, rows are streamed straight
+from the database cursor, and every response carries an ETag/Last-Modified
+pair derived from the published events so clients can revalidate cheaply.
+"""
+
+import hashlib
+import json
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+
+from django.db.models import Count, Max
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from .models import Event
+
+# Window used when the client doesn't ask for one, and the largest it may ask for
+DEFAULT_PAST_DAYS = 31
+DEFAULT_FUTURE_DAYS = 183
+MAX_WINDOW_DAYS = 400
+
+FEED_FIELDS = ('id', 'slug', 'title', 'start_date', 'end_date', 'is_virtual', 'location', 'short_description')
+
+
+def _parse_bound(value):
+    if not value:
+        return None
+    parsed = parse_datetime(value.replace(' ', '+'))  # '+' in query strings arrives as a space
+    if parsed is None:
+        day = parse_date(value)
+        if day is None:
+            return None
+        parsed = datetime.combine(day, time.min)
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def get_window(request):
+    """The (start, end) range to serve, bounded even if the client asks for more"""
+    # The default window moves a day at a time so its ETag stays stable
+    today = timezone.localtime().replace(hour=0, minute=0, second=0, microsecond=0)
+    start = _parse_bound(request.GET.get('start')) or today - timedelta(days=DEFAULT_PAST_DAYS)
+    end = _parse_bound(request.GET.get('end')) or start + timedelta(days=DEFAULT_PAST_DAYS + DEFAULT_FUTURE_DAYS)
+    if end <= start or end - start > timedelta(days=MAX_WINDOW_DAYS):
+        end = start + timedelta(days=MAX_WINDOW_DAYS)
+    return start, end
+
+
+def window_queryset(start, end):
+    """Published events overlapping [start, end)"""
+    return Event.objects.filter(status='published', start_date__lt=end, end_date__gte=start)
+
+
+def feed_version(request):
+    """
+    (etag, last_modified) for the feed, computed once per request. The
+    event count is part of the ETag so deletions invalidate it too.
+    """
+    if not hasattr(request, '_calendar_version'):
+        start, end = get_window(request)
+        stats = window_queryset(start, end).aggregate(last_modified=Max('updated'), total=Count('pk'))
+        last_modified = stats['last_modified']
+        key = f"{request.path}|{start.isoformat()}|{end.isoformat()}|{stats['total']}|{last_modified and last_modified.isoformat()}"
+        request._calendar_version = (hashlib.md5(key.encode()).hexdigest(), last_modified)
+    return request._calendar_version
+
+
+def feed_etag(request, *args, **kwargs):
+    return feed_version(request)[0]
+
+
+def feed_last_modified(request, *args, **kwargs):
+    return feed_version(request)[1]
+
+
+def feed_rows(request):
+    start, end = get_window(request)
+    return window_queryset(start, end).order_by('start_date').values(*FEED_FIELDS).iterator(chunk_size=500)
+
+
+def _detail_url_builder():
+    """Build event URLs from one reverse() instead of one per row"""
+    placeholder = 'event-slug-placeholder'
+    template = reverse('events:event_detail', args=[placeholder])
+    return lambda slug: template.replace(placeholder, slug)
+
+
+def json_stream(rows):
+    """Yield a JSON array of FullCalendar event objects"""
+    url_for = _detail_url_builder()
+    yield '['
+    for index, row in enumerate(rows):
+        item = {
+            'id': row['id'],
+            'title': row['title'],
+            'start': row['start_date'].isoformat(),
+            'end': row['end_date'].isoformat(),
+            'url': url_for(row['slug']),
+            'allDay': (row['end_date'] - row['start_date']).days > 0,
+            'className': 'bg-primary' if row['is_virtual'] else 'bg-success',
+        }
+        yield (',' if index else '') + json.dumps(item)
+    yield ']'
+
+
+def _ics_escape(text):
+    return (
+        (text or '')
+        .replace('\\', '\\\\')
+        .replace(';', '\\;')
+        .replace(',', '\\,')
+        .replace('\r\n', '\\n')
+        .replace('\n', '\\n')
+    )
+
+
+def _ics_datetime(value):
+    return value.astimezone(dt_timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+
+
+def _ics_line(line):
+    """Fold a content line to 75 octets as required by RFC 5545"""
+    encoded = line.encode('utf-8')
+    if len(encoded) <= 75:
+        return line + '\r\n'
+    parts = []
+    while encoded:
+        limit = 75 if not parts else 74
+        chunk = encoded[:limit]
+        # Don't split a multi-byte character
+        while True:
+            try:
+                part = chunk.decode('utf-8')
+                break
+            except UnicodeDecodeError:
+                chunk = chunk[:-1]
+        parts.append(part)
+        encoded = encoded[len(chunk):]
+    return '\r\n '.join(parts) + '\r\n'
+
+
+def ics_stream(rows, base_url, host):
+    """Yield an iCalendar document for the rows"""
+    url_for = _detail_url_builder()
+    stamp = _ics_datetime(timezone.now())
+    yield _ics_line('BEGIN:VCALENDAR')
+    yield _ics_line('VERSION:2.0')
+    yield _ics_line('PRODID:-//NxGen//Events//EN')
+    yield _ics_line('CALSCALE:GREGORIAN')
+    for row in rows:
+        yield _ics_line('BEGIN:VEVENT')
+        yield _ics_line(f"UID:event-{row['id']}@{host}")
+        yield _ics_line(f'DTSTAMP:{stamp}')
+        yield _ics_line(f"DTSTART:{_ics_datetime(row['start_date'])}")
+        yield _ics_line(f"DTEND:{_ics_datetime(row['end_date'])}")
+        yield _ics_line(f"SUMMARY:{_ics_escape(row['title'])}")
+        if row['short_description']:
+            yield _ics_line(f"DESCRIPTION:{_ics_escape(row['short_description'])}")
+        if row['location']:
+            yield _ics_line(f"LOCATION:{_ics_escape(row['location'])}")
+        yield _ics_line(f"URL:{base_url}{url_for(row['slug'])}")
+        yield _ics_line('END:VEVENT')
+    yield _ics_line('END:VCALENDAR')
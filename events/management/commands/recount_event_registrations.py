@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from events.models import Event, Registration
+
+
+class Command(BaseCommand):
+    help = 'Rebuild Event.confirmed_count from the confirmed and attended registrations'
+
+    def handle(self, *args, **options):
+        seats = (
+            Registration.objects.filter(event=OuterRef('pk'), status__in=Registration.SEAT_STATUSES)
+            .order_by()
+            .values('event')
+            .annotate(total=Count('pk'))
+            .values('total')
+        )
+        updated = Event.objects.update(
+            confirmed_count=Coalesce(Subquery(seats, output_field=IntegerField()), 0)
+        )
+        self.stdout.write(self.style.SUCCESS(f'Recounted registrations for {updated} events'))
@@ -1,15 +1,22 @@
 # models.py - Fixed version
 
 import logging
-from django.db import models
+from django.db import models, transaction, IntegrityError
+from django.db.models import Count, F, Q
+from django.core.cache import cache
 from django.urls import reverse
 from django.utils import timezone
 from django.contrib.auth.models import User
-from django.utils.text import slugify
+
+from nxgen.counters import protect_counters
+from nxgen.slugs import UniqueSlugMixin
 
 logger = logging.getLogger(__name__)
 
-class EventCategory(models.Model):
+TYPE_COUNTS_CACHE_KEY = 'events:type_counts'
+TYPE_COUNTS_TIMEOUT = 60  # Short, so events still move between tabs as time passes
+
+class EventCategory(UniqueSlugMixin, models.Model):
     name = models.CharField(max_length=100)
     slug = models.SlugField(max_length=100, unique=True)
     description = models.TextField(blank=True)
@@ -17,17 +24,14 @@ class EventCategory(models.Model):
     def __str__(self):
         return self.name
     
-    def save(self, *args, **kwargs):
-        if not self.slug:
-            self.slug = slugify(self.name)
-        super().save(*args, **kwargs)
+    slug_source = 'name'
     
     class Meta:
         verbose_name_plural = "Event Categories"
         ordering = ['name']
 
 
-class Event(models.Model):
+class Event(UniqueSlugMixin, models.Model):
     STATUS_CHOICES = (
         ('draft', 'Draft'),
         ('published', 'Published'),
@@ -57,6 +61,10 @@ class Event(models.Model):
     updated = models.DateTimeField(auto_now=True)
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='published') 
     
+    # Registrations holding a seat (confirmed or attended), maintained by
+    # reserve_seat/release_seat and the Registration signals
+    confirmed_count = models.PositiveIntegerField(default=0, editable=False)
+    
     class Meta:
         ordering = ['-start_date']
         indexes = [
@@ -92,71 +100,106 @@ class Event(models.Model):
 
     def get_similar_events(self):
         """
-        Get similar events based on categories.
-        Returns up to 3 upcoming or ongoing events from the same categories.
+        Get similar events from the precomputed recommendations.
+        Returns up to 3 upcoming or ongoing events, best match first.
         """
-        # Get the event's categories
-        categories = self.categories.all()
-        
-        if not categories:
-            return Event.objects.none()
-        
-        # Get upcoming or ongoing events in the same categories, excluding this event
-        now = timezone.now()
-        similar_events = Event.objects.filter(
-            categories__in=categories,
-            end_date__gte=now,
-            status='published'
-        ).exclude(id=self.id).distinct()
-        
-        # Return up to 3 events
-        return similar_events[:3]
+        from recommendations.engine import similar_events
+        return similar_events(self)
+    
+    @classmethod
+    def type_counts(cls):
+        """
+        Number of published upcoming, ongoing and past events, computed with
+        one conditional aggregate and cached until an event changes.
+        """
+        counts = cache.get(TYPE_COUNTS_CACHE_KEY)
+        if counts is None:
+            now = timezone.now()
+            counts = cls.objects.filter(status='published').aggregate(
+                upcoming=Count('pk', filter=Q(start_date__gt=now)),
+                ongoing=Count('pk', filter=Q(start_date__lte=now, end_date__gte=now)),
+                past=Count('pk', filter=Q(end_date__lt=now)),
+            )
+            cache.set(TYPE_COUNTS_CACHE_KEY, counts, TYPE_COUNTS_TIMEOUT)
+        return counts
     
     @property
     def registration_percentage(self):
         """Calculate the percentage of capacity filled by registrations."""
         if not self.capacity:
             return 0
-        registered_count = self.registrations.filter(status__in=['confirmed', 'attended']).count()
-        return min(100, int((registered_count / self.capacity) * 100))
+        return min(100, int((self.confirmed_count / self.capacity) * 100))
 
     @property
     def spots_left(self):
         """Calculate the number of spots left."""
         if not self.capacity:
             return None  # Unlimited capacity
-        registered_count = self.registrations.filter(status__in=['confirmed', 'attended']).count()
-        return max(0, self.capacity - registered_count)
+        return max(0, self.capacity - self.confirmed_count)
 
     @property
     def is_full(self):
         """Check if the event has reached capacity."""
         if not self.capacity:
             return False  # Unlimited capacity
-        registered_count = self.registrations.filter(status__in=['confirmed', 'attended']).count()
-        return registered_count >= self.capacity
+        return self.confirmed_count >= self.capacity
+    
+    @classmethod
+    def reserve_seat(cls, event_id):
+        """
+        Atomically take a seat if one is free. The capacity check and the
+        increment happen in a single conditional UPDATE, so concurrent
+        registrations can't oversubscribe the event.
+        """
+        return cls.objects.filter(
+            Q(capacity__isnull=True) | Q(confirmed_count__lt=F('capacity')),
+            pk=event_id,
+        ).update(confirmed_count=F('confirmed_count') + 1) == 1
     
-    def register_user(self, user):
-        """Register a user for this event if possible."""
+    @classmethod
+    def release_seat(cls, event_id):
+        """Give a seat back, handing it to the oldest waitlisted registration if any"""
+        with transaction.atomic():
+            cls.objects.filter(pk=event_id, confirmed_count__gt=0).update(
+                confirmed_count=F('confirmed_count') - 1
+            )
+            
+            # Only promote while the event hasn't started
+            waitlisted = Registration.objects.select_for_update().filter(
+                event_id=event_id, status='waitlisted', event__start_date__gt=timezone.now()
+            ).order_by('registration_date').first()
+            if waitlisted and cls.reserve_seat(event_id):
+                # Queryset update so the signals don't count the seat twice
+                Registration.objects.filter(pk=waitlisted.pk).update(status='confirmed')
+                logger.info(f"Promoted waitlisted registration {waitlisted.pk} for event {event_id}")
+    
+    def register_user(self, user, notes=''):
+        """
+        Register a user for this event. If the event is full the user is
+        waitlisted instead. Returns (registration, message); registration
+        is None if the user could not be registered.
+        """
         if not self.registration_open:
-            return False, "Registration is closed for this event."
-        
-        if self.is_full:
-            return False, "This event has reached its capacity."
-        
-        if Registration.objects.filter(event=self, attendee=user).exists():
-            return False, "You are already registered for this event."
+            return None, "Registration is closed for this event."
         
         try:
-            Registration.objects.create(
-                event=self,
-                attendee=user,
-                status='confirmed'
-            )
-            return True, "You've successfully registered for this event!"
-        except Exception as e:
-            logger.error(f"Error registering user {user.username} for event {self.title}: {str(e)}")
-            return False, "An error occurred during registration. Please try again."
+            with transaction.atomic():
+                seat = Event.reserve_seat(self.pk)
+                registration = Registration(
+                    event=self,
+                    attendee=user,
+                    notes=notes,
+                    status='confirmed' if seat else 'waitlisted',
+                )
+                # The seat is already counted by reserve_seat
+                registration._seat_counted = True
+                registration.save()
+        except IntegrityError:
+            return None, "You are already registered for this event."
+        
+        if seat:
+            return registration, "You've successfully registered for this event!"
+        return registration, "This event is full, you've been added to the waitlist."
 
     def unregister_user(self, user):
         """Unregister a user from this event."""
@@ -173,18 +216,7 @@ class Event(models.Model):
             return False, "You are not registered for this event."
     
     def save(self, *args, **kwargs):
-        # Generate slug if not provided
-        if not self.slug:
-            self.slug = slugify(self.title)
-        
-        # Handle slug uniqueness
-        original_slug = self.slug
-        counter = 1
-        
-        # Check if slug exists, and if so, append a suffix
-        while Event.objects.filter(slug=self.slug).exclude(id=self.id).exists():
-            self.slug = f"{original_slug}-{counter}"
-            counter += 1
+        # The slug is generated and made unique by UniqueSlugMixin
         
         # Set a sensible short description if not provided
         if not self.short_description and self.description:
@@ -194,16 +226,20 @@ class Event(models.Model):
         if self.start_date and self.end_date and self.end_date < self.start_date:
             self.end_date = self.start_date
         
-        # Call the original save method
-        super().save(*args, **kwargs)
+        # Don't let a stale instance overwrite the maintained seat count
+        super().save(*args, **protect_counters(self, ('confirmed_count',), kwargs))
         logger.debug(f"Saved event: {self}")
 
 
 class Registration(models.Model):
+    # Statuses that hold one of the event's seats
+    SEAT_STATUSES = ('confirmed', 'attended')
+    CANCELED = 'canceled'
+    
     STATUS_CHOICES = (
         ('pending', 'Pending'),
         ('confirmed', 'Confirmed'),
-        ('canceled', 'Canceled'),
+        (CANCELED, 'Canceled'),
         ('attended', 'Attended'),
         ('waitlisted', 'Waitlisted'),
     )
@@ -241,11 +277,15 @@ class Registration(models.Model):
         if self.event.start_date <= timezone.now():
             return False, "Cannot cancel registration for an event that has already started"
         
-        self.status = 'canceled'
+        self.status = self.CANCELED
         self.save()
         logger.info(f"Canceled registration {self.id}")
         return True, "Registration canceled successfully"
     
+    @property
+    def holds_seat(self):
+        return self.status in self.SEAT_STATUSES
+    
     @property
     def is_active(self):
         """Check if registration is active (confirmed or pending)"""
@@ -254,7 +294,7 @@ class Registration(models.Model):
     @property
     def can_cancel(self):
         """Check if registration can be canceled"""
-        if self.status == 'canceled':
+        if self.status == self.CANCELED:
             return False
         if self.event.start_date <= timezone.now():
             return False
@@ -0,0 +1,52 @@
+from django.core.cache import cache
+from django.db.models import F
+from django.db.models.signals import m2m_changed, post_init, post_save, post_delete
+from django.dispatch import receiver
+
+from nxgen.pagecache import invalidate_tags
+
+from .models import Event, EventCategory, Registration, TYPE_COUNTS_CACHE_KEY
+
+@receiver(post_save, sender=Event)
+@receiver(post_delete, sender=Event)
+def invalidate_type_counts(sender, **kwargs):
+    """Drop the cached upcoming/ongoing/past tab counts"""
+    cache.delete(TYPE_COUNTS_CACHE_KEY)
+
+@receiver(post_init, sender=Registration)
+def remember_registration_status(sender, instance, **kwargs):
+    """Keep the status as loaded so seat changes can be detected on save"""
+    instance._saved_status = instance.status if instance.pk else None
+
+@receiver(post_save, sender=Registration)
+def update_seats_on_registration_save(sender, instance, created, **kwargs):
+    """Keep Event.confirmed_count in step with registration status changes"""
+    had_seat = not created and instance._saved_status in Registration.SEAT_STATUSES
+    instance._saved_status = instance.status
+    
+    if getattr(instance, '_seat_counted', False):
+        # Created through Event.register_user, which already reserved the seat
+        instance._seat_counted = False
+        return
+    
+    if instance.holds_seat and not had_seat:
+        # Confirmed by an organizer or admin, counted even beyond capacity
+        Event.objects.filter(pk=instance.event_id).update(confirmed_count=F('confirmed_count') + 1)
+    elif had_seat and not instance.holds_seat:
+        Event.release_seat(instance.event_id)
+
+@receiver(post_delete, sender=Registration)
+def update_seats_on_registration_delete(sender, instance, **kwargs):
+    if instance._saved_status in Registration.SEAT_STATUSES:
+        Event.release_seat(instance.event_id)
+
+@receiver(post_save, sender=Event)
+@receiver(post_delete, sender=Event)
+@receiver(m2m_changed, sender=Event.categories.through)
+@receiver(post_save, sender=EventCategory)
+@receiver(post_delete, sender=EventCategory)
+@receiver(post_save, sender=Registration)
+@receiver(post_delete, sender=Registration)
+def invalidate_event_pages(sender, **kwargs):
+    """Drop the cached event listing, which also shows the seats left"""
+    invalidate_tags('events')
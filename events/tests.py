@@ -1,3 +1,108 @@
-from django.test import TestCase
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.db import OperationalError, connection
+from django.core.cache import cache
+from django.test import TestCase, TransactionTestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from .models import Event, Registration
+
+
+def make_event(**kwargs):
+    start = timezone.now() + timedelta(days=7)
+    defaults = {
+        'title': 'Spring Hackathon',
+        'description': 'Build something',
+        'start_date': start,
+        'end_date': start + timedelta(days=2),
+        'location': 'Main hall',
+    }
+    defaults.update(kwargs)
+    return Event.objects.create(**defaults)
+
+
+class SeatCountTests(TestCase):
+    def setUp(self):
+        self.event = make_event(capacity=2)
+        self.users = [User.objects.create_user(f'user{i}') for i in range(3)]
+
+    def test_full_event_waitlists(self):
+        statuses = [self.event.register_user(user)[0].status for user in self.users]
+        self.assertEqual(statuses, ['confirmed', 'confirmed', 'waitlisted'])
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.confirmed_count, 2)
+        self.assertTrue(self.event.is_full)
+
+    def test_cancel_promotes_waitlisted(self):
+        first, _ = self.event.register_user(self.users[0])
+        self.event.register_user(self.users[1])
+        waitlisted, _ = self.event.register_user(self.users[2])
+
+        first.cancel()
+        waitlisted.refresh_from_db()
+        self.event.refresh_from_db()
+        self.assertEqual(waitlisted.status, 'confirmed')
+        self.assertEqual(self.event.confirmed_count, 2)
+
+
+class ConcurrentRegistrationTests(TransactionTestCase):
+    """
+    Parallel sign-ups must never oversubscribe an event. SQLite serializes
+    writers, so the race only has room to show on a database with row-level
+    concurrency such as Postgres; on SQLite this checks the invariants.
+    """
+
+    capacity = 25
+    attendees = 200
+    workers = 20
+
+    def register(self, event, user):
+        try:
+            for attempt in range(50):
+                try:
+                    return event.register_user(user)[0].status
+                except OperationalError:
+                    # SQLite allows a single writer, back off and retry
+                    time.sleep(0.01 * (attempt + 1))
+            raise AssertionError(f'Could not register {user}')
+        finally:
+            connection.close()
+
+    def test_parallel_registrations(self):
+        event = make_event(capacity=self.capacity)
+        users = [User.objects.create_user(f'attendee{i}') for i in range(self.attendees)]
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            statuses = list(pool.map(lambda user: self.register(event, user), users))
+
+        self.assertEqual(statuses.count('confirmed'), self.capacity)
+        self.assertEqual(statuses.count('waitlisted'), self.attendees - self.capacity)
+        event.refresh_from_db()
+        self.assertEqual(event.confirmed_count, self.capacity)
+        self.assertEqual(Registration.objects.filter(event=event, status='confirmed').count(), self.capacity)
+
+
+class EventListQueryTests(TestCase):
+    def setUp(self):
+        for i in range(12):
+            make_event(title=f'Event {i}')
+        cache.clear()
+
+    def test_cold_listing(self):
+        # Tab counts (also the paginator count), categories, the page and its categories
+        with self.assertNumQueries(4):
+            response = self.client.get(reverse('events:event_list'))
+        self.assertEqual(response.context['paginator'].count, 12)
+        self.assertEqual(len(response.context['events']), 9)
+
+    def test_warm_listing(self):
+        self.client.force_login(User.objects.create_user('visitor'))
+        self.client.get(reverse('events:event_list'))
+        # Session, user, the navbar profile and the organizer check; the
+        # listing itself is cached
+        with self.assertNumQueries(4):
+            self.client.get(reverse('events:event_list'))
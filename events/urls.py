@@ -17,6 +17,7 @@ urlpatterns = [
     
     # Calendar data
     path('calendar-data/', views.calendar_events_json, name='calendar_data'),
+    path('calendar.ics', views.calendar_ics, name='calendar_ics'),
     
     # This should be last to avoid conflicts with other URL patterns
     path('<slug:slug>/', views.EventDetailView.as_view(), name='event_detail'),
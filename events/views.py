@@ -6,16 +6,22 @@ from django.contrib.auth.mixins import LoginRequiredMixin
 from django.contrib.auth.decorators import login_required
 from django.urls import reverse_lazy
 from django.utils import timezone
-from django.db.models import Q, Count, Prefetch
+from django.db.models import Q, Prefetch
 from django.contrib import messages
-from django.http import JsonResponse, Http404
+from django.http import Http404, StreamingHttpResponse
+from django.views.decorators.http import condition
+from django.utils.decorators import method_decorator
 import logging
 
 logger = logging.getLogger(__name__)
 
+from nxgen.pagecache import cache_page_by_tags
+
+from . import calendar
 from .models import Event, EventCategory, Registration
 from .forms import EventForm, RegistrationForm
 
+@method_decorator(cache_page_by_tags('events'), name='dispatch')
 class EventListView(ListView):
     model = Event
     template_name = 'events/event_list.html'
@@ -23,34 +29,25 @@ class EventListView(ListView):
     paginate_by = 9
     
     def get_queryset(self):
-        # Log total events for debugging
-        logger.debug(f"Total events in database: {Event.objects.count()}")
-        
-        # Start with all events and prefetch related fields for performance
-        base_queryset = Event.objects.prefetch_related(
-            'categories',
-            Prefetch('registrations', queryset=Registration.objects.filter(status='confirmed'), to_attr='confirmed_registrations')
-        )
-        
-        logger.debug(f"All events count: {base_queryset.count()}")
+        # Start with all events and prefetch related fields for performance.
+        # Seat counts come from Event.confirmed_count, so registrations are
+        # not loaded at all.
+        base_queryset = Event.objects.prefetch_related('categories')
         
         # Filter for published events or drafts if the user is an organizer or staff
         if self.request.user.is_authenticated and (self.request.user.is_staff or self.request.user.organized_events.exists()):
             queryset = base_queryset.filter(
                 Q(status='published') | Q(status='draft', organizers=self.request.user)
             )
+            self.audience = self.request.user.pk
         else:
             queryset = base_queryset.filter(status='published')
-        
-        logger.debug(f"Published events count: {queryset.count()}")
+            self.audience = 'public'
         
         # Filter by event type (upcoming, ongoing, past)
         event_type = self.request.GET.get('type', 'upcoming')
         now = timezone.now()
         
-        # Save the unfiltered published queryset for debugging
-        events_before_date_filter = queryset.count()
-        
         if event_type == 'upcoming':
             queryset = queryset.filter(start_date__gt=now)
         elif event_type == 'ongoing':
@@ -58,9 +55,6 @@ class EventListView(ListView):
         elif event_type == 'past':
             queryset = queryset.filter(end_date__lt=now)
         
-        # Debug date filtering
-        logger.debug(f"Events after type filtering ({event_type}): {queryset.count()} (from {events_before_date_filter})")
-        
         # Filter by category
         category = self.request.GET.get('category')
         if category:
@@ -83,20 +77,35 @@ class EventListView(ListView):
             # For upcoming and ongoing events, show the soonest ones first
             return queryset.order_by('start_date')
     
+    def get_paginator(self, queryset, per_page, **kwargs):
+        paginator = super().get_paginator(queryset, per_page, **kwargs)
+        # The public, unfiltered tabs are exactly what type_counts counts, so
+        # the paginator can reuse the cached number instead of a COUNT query
+        event_type = self.request.GET.get('type', 'upcoming')
+        filtered = self.request.GET.get('category') or self.request.GET.get('search')
+        if self.audience == 'public' and not filtered and event_type in ('upcoming', 'ongoing', 'past'):
+            paginator.count = Event.type_counts()[event_type]
+        return paginator
+    
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
+        # Only evaluated when the cached category links are rebuilt
         context['categories'] = EventCategory.objects.all()
         
         # Add filter parameters to context for maintaining state in templates
         context['current_type'] = self.request.GET.get('type', 'upcoming')
         context['current_category'] = self.request.GET.get('category', '')
         context['search_query'] = self.request.GET.get('search', '')
+        # Staff and organizers also see drafts, so their cached listing is their own
+        context['event_audience'] = self.audience
+        # The paginator has already counted the listing, logging it is free
+        logger.debug("Listing %s events (%s)", context['paginator'].count, context['current_type'])
         
-        # Count events by type for display in filter buttons
-        now = timezone.now()
-        context['upcoming_count'] = Event.objects.filter(status='published', start_date__gt=now).count()
-        context['ongoing_count'] = Event.objects.filter(status='published', start_date__lte=now, end_date__gte=now).count()
-        context['past_count'] = Event.objects.filter(status='published', end_date__lt=now).count()
+        # Count events by type for display in filter buttons (one cached query)
+        type_counts = Event.type_counts()
+        context['upcoming_count'] = type_counts['upcoming']
+        context['ongoing_count'] = type_counts['ongoing']
+        context['past_count'] = type_counts['past']
         
         return context
 
@@ -161,7 +170,7 @@ class EventDetailView(DetailView):
             context['is_organizer'] = self.object.organizers.filter(id=self.request.user.id).exists()
         
         # Add registration stats
-        context['registration_count'] = self.object.registrations.filter(status='confirmed').count()
+        context['registration_count'] = self.object.confirmed_count
         context['capacity_percentage'] = self.object.registration_percentage
         context['spots_left'] = self.object.spots_left
         
@@ -203,42 +212,25 @@ def register_for_event(request, pk):
         messages.error(request, "Registration for this event is closed.")
         return redirect(event.get_absolute_url())
     
-    # Check if event is full
-    if event.is_full:
-        messages.error(request, "This event has reached its capacity.")
-        return redirect(event.get_absolute_url())
-    
     # Check if user is already registered
     existing_registration = Registration.objects.filter(event=event, attendee=request.user).first()
     if existing_registration:
         messages.info(request, f"You're already registered for this event (status: {existing_registration.status}).")
         return redirect(event.get_absolute_url())
     
-    # Process form data if provided
+    # Process form data if provided; a full event puts the user on the waitlist
     form = RegistrationForm(request.POST or None)
-    if form.is_valid():
-        registration = form.save(commit=False)
-        registration.event = event
-        registration.attendee = request.user
-        registration.status = 'confirmed'
-        registration.save()
-        
-        messages.success(request, "You've successfully registered for this event!")
-        logger.info(f"User {request.user.username} registered for event {event.title} (ID: {event.id})")
+    notes = form.cleaned_data.get('notes', '') if form.is_valid() else ''
+    registration, message = event.register_user(request.user, notes=notes)
+    
+    if registration is None:
+        messages.error(request, message)
+    elif registration.status == 'waitlisted':
+        messages.info(request, message)
+        logger.info(f"User {request.user.username} waitlisted for event {event.title} (ID: {event.id})")
     else:
-        # If the form has errors but we're still creating a basic registration
-        try:
-            registration = Registration.objects.create(
-                event=event,
-                attendee=request.user,
-                status='confirmed'
-            )
-            messages.success(request, "You've successfully registered for this event!")
-            logger.info(f"User {request.user.username} registered for event {event.title} (ID: {event.id})")
-            
-        except Exception as e:
-            logger.error(f"Registration failed: {str(e)}")
-            messages.error(request, "An error occurred during registration. Please try again.")
+        messages.success(request, message)
+        logger.info(f"User {request.user.username} registered for event {event.title} (ID: {event.id})")
     
     return redirect(event.get_absolute_url())
 
@@ -276,35 +268,26 @@ def unregister_from_event(request, pk):
     return redirect(event.get_absolute_url())
 
 
+@condition(etag_func=calendar.feed_etag, last_modified_func=calendar.feed_last_modified)
 def calendar_events_json(request):
     """View to provide event data for calendar display"""
-    # Get published events
-    events = Event.objects.filter(status='published')
-    
-    # Filter for date range if provided
-    start = request.GET.get('start')
-    end = request.GET.get('end')
-    if start and end:
-        events = events.filter(
-            Q(start_date__range=[start, end]) | 
-            Q(end_date__range=[start, end]) |
-            Q(start_date__lte=start, end_date__gte=end)
-        )
-    
-    # Format events for calendar
-    calendar_events = []
-    for event in events:
-        calendar_events.append({
-            'id': event.id,
-            'title': event.title,
-            'start': event.start_date.isoformat(),
-            'end': event.end_date.isoformat(),
-            'url': event.get_absolute_url(),
-            'allDay': (event.end_date - event.start_date).days > 0,
-            'className': 'bg-primary' if event.is_virtual else 'bg-success'
-        })
-    
-    return JsonResponse(calendar_events, safe=False)
+    response = StreamingHttpResponse(calendar.json_stream(calendar.feed_rows(request)), content_type='application/json')
+    response['Cache-Control'] = 'no-cache'
+    return response
+
+
+@condition(etag_func=calendar.feed_etag, last_modified_func=calendar.feed_last_modified)
+def calendar_ics(request):
+    """iCalendar export of the same feed, for subscribing from calendar apps"""
+    stream = calendar.ics_stream(
+        calendar.feed_rows(request),
+        base_url=f"{request.scheme}://{request.get_host()}",
+        host=request.get_host(),
+    )
+    response = StreamingHttpResponse(stream, content_type='text/calendar; charset=utf-8')
+    response['Content-Disposition'] = 'inline; filename="events.ics"'
+    response['Cache-Control'] = 'no-cache'
+    return response
 
 
 class ManageAttendeesView(LoginRequiredMixin, DetailView):
@@ -328,7 +311,7 @@ class ManageAttendeesView(LoginRequiredMixin, DetailView):
         # Group registrations by status
         context['confirmed_registrations'] = registrations.filter(status='confirmed')
         context['pending_registrations'] = registrations.filter(status='pending')
-        context['canceled_registrations'] = registrations.filter(status='canceled')
+        context['canceled_registrations'] = registrations.filter(status=Registration.CANCELED)
         context['attended_registrations'] = registrations.filter(status='attended')
         context['waitlisted_registrations'] = registrations.filter(status='waitlisted')
         
@@ -3,7 +3,7 @@ from .models import Category, Topic, Post, TopicView
 
 @admin.register(Category)
 class CategoryAdmin(admin.ModelAdmin):
-    list_display = ('name', 'slug', 'order', 'created_at')
+    list_display = ('name', 'slug', 'order', 'topic_count', 'post_count', 'created_at')
     prepopulated_fields = {'slug': ('name',)}
     search_fields = ('name',)
     list_filter = ('created_at',)
@@ -11,7 +11,7 @@ class CategoryAdmin(admin.ModelAdmin):
 
 @admin.register(Topic)
 class TopicAdmin(admin.ModelAdmin):
-    list_display = ('title', 'category', 'author', 'pinned', 'locked', 'created_at')
+    list_display = ('title', 'category', 'author', 'pinned', 'locked', 'post_count', 'created_at')
     list_filter = ('category', 'pinned', 'locked', 'created_at')
     search_fields = ('title', 'author__username')
     prepopulated_fields = {'slug': ('title',)}
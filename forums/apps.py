@@ -1,6 +1,13 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class ForumsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "forums"
+    
+    def ready(self):
+        import forums.signals  # noqa
+        
+        # The search index tables are created here rather than on first use
+        post_migrate.connect(forums.signals.create_search_tables, sender=self)
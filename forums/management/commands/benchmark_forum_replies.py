@@ -0,0 +1,67 @@
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, reset_queries, transaction
+from django.test.utils import CaptureQueriesContext
+
+from forums.models import Category, Topic, Post
+
+SHORT_REPLY = 'Thanks, that fixed it! The **migration** ran fine after the upgrade.'
+
+CODE_REPLY = '''Here is what worked for me:
+
+```python
+from django.db import models
+
+
+class Post(models.Model):
+    content = models.TextField()
+
+    def save(self, *args, **kwargs):
+        self.content = self.content.strip()
+        super().save(*args, **kwargs)
+```
+
+Then run `manage.py migrate` and restart the server.
+'''
+
+
+class Command(BaseCommand):
+    help = (
+        'Time posting replies to one topic: queries per reply, replies per second and the cost of '
+        're-saving an unchanged post. Everything is written in one transaction that is rolled back at the end. '
+        'Run it with DEBUG off, query logging skews the timings.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--replies', type=int, default=500, help='Replies to post for each kind')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            author = User.objects.create(username=f'reply-benchmark-{time.time_ns()}')
+            category = Category.objects.create(name=f'Reply benchmark {time.time_ns()}')
+            for kind, content in (('short', SHORT_REPLY), ('code-heavy', CODE_REPLY)):
+                topic = Topic.objects.create(title=f'{kind} replies', category=category, author=author)
+                self.stdout.write(f'{kind}: {self.time_replies(topic, author, content, options["replies"])}')
+
+            post = Post.objects.filter(topic__category=category).first()
+            with CaptureQueriesContext(connection) as queries:
+                post.save()
+            self.stdout.write(f'unchanged re-save: {len(queries)} queries')
+
+            transaction.set_rollback(True)
+        self.stdout.write(self.style.SUCCESS('Done, benchmark data rolled back'))
+
+    def time_replies(self, topic, author, content, replies):
+        """Post ``replies`` replies to ``topic``, returns a summary line"""
+        with CaptureQueriesContext(connection) as queries:
+            Post.objects.create(topic=topic, author=author, content=content)
+        per_reply = len(queries)
+        started = time.perf_counter()
+        for _ in range(replies):
+            Post.objects.create(topic=topic, author=author, content=content)
+            # Don't let the DEBUG query log grow with the run
+            reset_queries()
+        elapsed = time.perf_counter() - started
+        return f'{per_reply} queries per reply, {replies / elapsed:.0f} replies/s over {replies} replies'
@@ -0,0 +1,106 @@
+import itertools
+import random
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from forums.models import Category, Topic, Post
+from forums.search import DatabaseBackend, SQLiteFTSBackend, sqlite_has_fts5
+
+WORDS = (
+    'django python template query index cache model view form migration '
+    'deploy server database sqlite postgres search ranking thread signal '
+    'hackathon course event project mentor team frontend backend api test'
+).split()
+
+SYLLABLES = 'ka lo mi nu pe ra si to vu xe ba do fi gu he'.split()
+
+QUERIES = ['django', 'sqlite index', 'hackathon team', 'migrat', 'postgres ranking thread']
+
+
+def vocabulary(rng, size=5000):
+    """The common WORDS followed by made-up words, with Zipf-like cumulative weights"""
+    words = list(WORDS)
+    while len(words) < size:
+        words.append(''.join(rng.choices(SYLLABLES, k=rng.randint(2, 4))))
+    weights = itertools.accumulate(1 / rank for rank in range(1, len(words) + 1))
+    return words, list(weights)
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed a throwaway forum corpus and time the search backends against it. '
+        'Everything is written in one transaction that is rolled back at the end.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=1_000_000, help='Number of posts to seed')
+        parser.add_argument('--posts-per-topic', type=int, default=50)
+        parser.add_argument('--runs', type=int, default=5, help='Timed runs per query')
+        parser.add_argument('--skip-database', action='store_true', help="Don't time the icontains backend")
+
+    def handle(self, *args, **options):
+        backends = []
+        if sqlite_has_fts5():
+            backends.append(SQLiteFTSBackend())
+        if not options['skip_database']:
+            backends.append(DatabaseBackend())
+
+        rng = random.Random(0)
+        words, weights = vocabulary(rng)
+        # Frequent words match most posts, the rarest ones only a handful
+        queries = QUERIES + [words[-1], f'{words[100]} {words[-2]}']
+
+        with transaction.atomic():
+            started = time.perf_counter()
+            self.seed(rng, words, weights, options['posts'], options['posts_per_topic'])
+            self.stdout.write(f"Seeded {options['posts']} posts in {time.perf_counter() - started:.1f}s")
+
+            for backend in backends:
+                name = backend.__class__.__name__
+                started = time.perf_counter()
+                backend.rebuild()
+                self.stdout.write(f'{name}: rebuilt in {time.perf_counter() - started:.1f}s')
+                for query in queries:
+                    self.stdout.write(f'  {query!r}: {self.time_query(backend, query, options["runs"])}')
+
+            transaction.set_rollback(True)
+
+        # The rebuilt indexes were part of the transaction, so they are back too
+        self.stdout.write(self.style.SUCCESS('Done, seeded corpus rolled back'))
+
+    def seed(self, rng, words, weights, posts, posts_per_topic, batch_size=5000):
+        """Bulk insert the corpus, bypassing the per-row signals"""
+        author = User.objects.create(username=f'search-benchmark-{time.time_ns()}')
+        category = Category.objects.create(name=f'Search benchmark {time.time_ns()}')
+        topics = Topic.objects.bulk_create(
+            Topic(
+                title=' '.join(rng.choices(words, cum_weights=weights, k=6)), slug=f'{category.slug}-{i}',
+                category=category, author=author,
+            )
+            for i in range(-(-posts // posts_per_topic))
+        )
+        batch = []
+        for i in range(posts):
+            batch.append(Post(
+                topic=topics[i // posts_per_topic], author=author,
+                content=' '.join(rng.choices(words, cum_weights=weights, k=rng.randint(20, 120))),
+            ))
+            if len(batch) == batch_size:
+                Post.objects.bulk_create(batch)
+                batch = []
+        Post.objects.bulk_create(batch)
+
+    def time_query(self, backend, query, runs):
+        """Median time for a topic search, a post count and the first page of posts"""
+        timings = []
+        for _ in range(runs):
+            started = time.perf_counter()
+            backend.search_topics(query)
+            count = backend.count_posts(query)
+            backend.search_posts(query, 0, 20)
+            timings.append(time.perf_counter() - started)
+        timings.sort()
+        return f'{count} hits, median {timings[len(timings) // 2] * 1000:.1f}ms over {runs} runs'
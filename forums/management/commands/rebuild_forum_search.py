@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from forums.search import get_backend
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the forum full-text search index from the topic and post tables'
+
+    def handle(self, *args, **options):
+        backend = get_backend()
+        backend.rebuild()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt search index ({backend.__class__.__name__})'))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from forums.models import Category, Topic
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the denormalized topic/post counters and last post pointers of the forums'
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            topics = Topic.objects.recount_stats()
+            categories = Category.objects.recount_stats()
+        self.stdout.write(self.style.SUCCESS(f'Recounted {topics} topics in {categories} categories'))
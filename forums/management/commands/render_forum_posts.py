@@ -0,0 +1,7 @@
+from courses.management.commands.render_course_content import Command as RenderCommand
+from forums.models import Post
+
+
+class Command(RenderCommand):
+    help = 'Render and sanitize the markdown of every forum post into content_html'
+    models = (Post,)
@@ -1,10 +1,58 @@
 from django.db import models
 from django.contrib.auth.models import User
-from django.utils.text import slugify
 from django.urls import reverse
 from django.utils import timezone
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
 
-class Category(models.Model):
+from courses.rendering import content_hash, refresh_rendered_content
+from nxgen.counters import protect_counters
+from nxgen.slugs import UniqueSlugMixin
+
+
+def _count_subquery(queryset, outer_field):
+    """Correlated COUNT(*) so several counts can be computed without join fan-out"""
+    return Coalesce(
+        Subquery(
+            queryset.filter(**{outer_field: OuterRef('pk')})
+            .order_by()
+            .values(outer_field)
+            .annotate(total=Count('pk'))
+            .values('total'),
+            output_field=IntegerField(),
+        ),
+        0,
+    )
+
+
+class CategoryQuerySet(models.QuerySet):
+    def recount_stats(self):
+        """Rebuild the denormalized topic_count/post_count columns from scratch"""
+        return self.update(
+            topic_count=_count_subquery(Topic.objects.all(), 'category'),
+            post_count=_count_subquery(Post.objects.all(), 'topic__category'),
+        )
+
+
+class TopicQuerySet(models.QuerySet):
+    def recount_stats(self):
+        """Rebuild post_count and the last post pointer from scratch"""
+        return self.update(
+            post_count=_count_subquery(Post.objects.all(), 'topic'),
+            **last_post_expressions(),
+        )
+
+
+def last_post_expressions():
+    """Subqueries that set a topic's last_post/last_post_at from its newest post"""
+    newest = Post.objects.filter(topic=OuterRef('pk')).order_by('-created_at', '-pk')
+    return {
+        'last_post': Subquery(newest.values('pk')[:1]),
+        'last_post_at': Subquery(newest.values('created_at')[:1]),
+    }
+
+
+class Category(UniqueSlugMixin, models.Model):
     name = models.CharField(max_length=100)
     description = models.TextField(blank=True)
     slug = models.SlugField(unique=True)
@@ -12,6 +60,12 @@ class Category(models.Model):
     order = models.IntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
     
+    # Denormalized counters, maintained by forums.signals
+    topic_count = models.PositiveIntegerField(default=0, editable=False)
+    post_count = models.PositiveIntegerField(default=0, editable=False)
+    
+    objects = CategoryQuerySet.as_manager()
+    
     class Meta:
         verbose_name_plural = "Categories"
         ordering = ['order', 'name']
@@ -19,25 +73,25 @@ class Category(models.Model):
     def __str__(self):
         return self.name
     
+    slug_source = 'name'
+    
     def save(self, *args, **kwargs):
-        if not self.slug:
-            self.slug = slugify(self.name)
-        super().save(*args, **kwargs)
+        super().save(*args, **protect_counters(self, ('topic_count', 'post_count'), kwargs))
     
     def get_absolute_url(self):
         return reverse('forums:category_detail', kwargs={'slug': self.slug})
     
     def get_topic_count(self):
-        return Topic.objects.filter(category=self).count()
+        return self.topic_count
     
     def get_post_count(self):
-        return Post.objects.filter(topic__category=self).count()
+        return self.post_count
     
     def get_latest_post(self):
         return Post.objects.filter(topic__category=self).order_by('-created_at').first()
 
 
-class Topic(models.Model):
+class Topic(UniqueSlugMixin, models.Model):
     title = models.CharField(max_length=255)
     slug = models.SlugField(unique=True)
     category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name='topics')
@@ -46,6 +100,17 @@ class Topic(models.Model):
     locked = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    views_count = models.PositiveIntegerField(default=0)
+    
+    # Denormalized counters, maintained by forums.signals
+    post_count = models.PositiveIntegerField(default=0, editable=False)
+    last_post = models.ForeignKey(
+        'Post', on_delete=models.SET_NULL, null=True, blank=True,
+        related_name='+', editable=False
+    )
+    last_post_at = models.DateTimeField(null=True, blank=True, editable=False)
+    
+    objects = TopicQuerySet.as_manager()
     
     class Meta:
         ordering = ['-pinned', '-updated_at']
@@ -54,61 +119,61 @@ class Topic(models.Model):
         return self.title
     
     def save(self, *args, **kwargs):
-        if not self.slug:
-            self.slug = slugify(self.title)
-            
-            counter = 1
-            original_slug = self.slug
-            while Topic.objects.filter(slug=self.slug).exists():
-                self.slug = f"{original_slug}-{counter}"
-                counter += 1
-        super().save(*args, **kwargs)
+        counters = ('views_count', 'post_count', 'last_post', 'last_post_at')
+        super().save(*args, **protect_counters(self, counters, kwargs))
     
     def get_absolute_url(self):
         return reverse('forums:topic_detail', kwargs={'category_slug': self.category.slug, 'slug': self.slug})
     
     def get_post_count(self):
-        return self.posts.count()
+        return self.post_count
     
     def get_view_count(self):
-        return self.views.count()
+        return self.views_count
     
     def get_last_post(self):
-        return self.posts.order_by('-created_at').first()
+        return self.last_post
 
 
 class Post(models.Model):
     topic = models.ForeignKey(Topic, on_delete=models.CASCADE, related_name='posts')
     author = models.ForeignKey(User, on_delete=models.CASCADE, related_name='forum_posts')
     content = models.TextField()
-    content_html = models.TextField(blank=True)  
+    content_html = models.TextField(blank=True, editable=False)  # Sanitized render of content
+    content_hash = models.CharField(max_length=40, blank=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     edited = models.BooleanField(default=False)
     
     class Meta:
         ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['topic', 'created_at']),
+        ]
     
     def __str__(self):
         return f"Post by {self.author.username} on {self.topic.title}"
     
     def save(self, *args, **kwargs):
-        
-        import markdown
-        self.content_html = markdown.markdown(
-            self.content,
-            extensions=['markdown.extensions.fenced_code', 'markdown.extensions.tables', 'markdown.extensions.nl2br']
-        )
-        
-        
-        if self.pk and (timezone.now() - self.created_at).seconds > 60:
+        # Only an actual content change counts as an edit or needs re-rendering;
+        # the topic's updated_at/last post are bumped by forums.signals
+        update_fields = kwargs.get('update_fields')
+        # An empty content_hash means the post predates hashing (render_forum_posts
+        # backfills it): it is re-rendered, but not known to be an edit
+        content_changed = content_hash(self.content) != self.content_hash
+        if not self._state.adding and not content_changed and update_fields is None and not kwargs.get('force_insert'):
+            # Nothing to re-render or re-index, leave the content columns alone
+            update_fields = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in ('content', 'content_html', 'content_hash')
+            ]
+        elif self.pk and self.created_at and content_changed and self.content_hash and (timezone.now() - self.created_at).total_seconds() > 60:
             self.edited = True
-            
-        super().save(*args, **kwargs)
+            if update_fields is not None:
+                update_fields = set(update_fields) | {'edited'}
         
-        
-        self.topic.updated_at = timezone.now()
-        self.topic.save(update_fields=['updated_at'])
+        kwargs['update_fields'] = refresh_rendered_content(self, update_fields)
+        super().save(*args, **kwargs)
 
 
 class TopicView(models.Model):
@@ -119,3 +184,18 @@ class TopicView(models.Model):
     
     class Meta:
         unique_together = [['topic', 'user'], ['topic', 'ip_address']]
+    
+    @classmethod
+    def record(cls, topic, request):
+        """
+        Store an exact per-user (or per-IP) view row. This costs a write per
+        page view, so it only runs when FORUM_RECORD_TOPIC_VIEWS is enabled;
+        view counts come from analytics.counters.topic_views either way.
+        """
+        if request.user.is_authenticated:
+            cls.objects.update_or_create(topic=topic, user=request.user)
+        else:
+            ip_address = request.META.get('REMOTE_ADDR')
+            # Anonymous views without an address can't be told apart
+            if ip_address:
+                cls.objects.update_or_create(topic=topic, user=None, ip_address=ip_address)
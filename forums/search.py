@@ -0,0 +1,282 @@
+"""
+Full-text search for the forums.
+
+Search goes through a backend object so the storage can change without
+touching the views. ``SQLiteFTSBackend`` keeps FTS5 indexes next to the
+forum tables; they are created after every ``migrate``, filled from the
+existing topics and posts when they are new or empty, and kept up to date
+by forums.signals. ``rebuild_forum_search`` rebuilds them from scratch. ``DatabaseBackend`` is the plain ``icontains`` fallback
+for databases without FTS support.
+Another implementation (e.g. a Postgres tsvector one) can be plugged in
+with the ``FORUM_SEARCH_BACKEND`` setting.
+"""
+
+import re
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connection, connections
+from django.utils.html import escape
+from django.utils.module_loading import import_string
+
+from .models import Topic, Post
+
+# Control characters used as highlight markers so the snippet can be
+# escaped before the <mark> tags are put in
+HIGHLIGHT_START = '\x02'
+HIGHLIGHT_END = '\x03'
+
+WORD_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def highlight(snippet):
+    """Escape a snippet and turn the highlight markers into <mark> tags"""
+    return (
+        escape(snippet)
+        .replace(HIGHLIGHT_START, '<mark>')
+        .replace(HIGHLIGHT_END, '</mark>')
+    )
+
+
+class SearchResults:
+    """
+    Lazy, sliceable result set so search results can be handed to a Paginator.
+    Only the requested page is fetched and hydrated into Post instances.
+    """
+
+    def __init__(self, backend, query):
+        self.backend = backend
+        self.query = query
+        self._count = None
+
+    def count(self):
+        if self._count is None:
+            self._count = self.backend.count_posts(self.query)
+        return self._count
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+        offset = index.start or 0
+        limit = (index.stop - offset) if index.stop is not None else self.count() - offset
+        return self.backend.search_posts(self.query, offset, limit)
+
+
+class BaseBackend:
+    def index_topic(self, topic):
+        pass
+
+    def remove_topic(self, topic_id):
+        pass
+
+    def index_post(self, post):
+        pass
+
+    def remove_post(self, post_id):
+        pass
+
+    def create_tables(self, using=DEFAULT_DB_ALIAS):
+        """Create whatever storage the backend needs and index existing rows into it; run from post_migrate"""
+
+    def rebuild(self):
+        pass
+
+    def search_topics(self, query, limit=20):
+        """Return up to ``limit`` topics matching ``query``, best match first"""
+        raise NotImplementedError
+
+    def count_posts(self, query):
+        raise NotImplementedError
+
+    def search_posts(self, query, offset, limit):
+        """Return a page of matching posts, each with a highlighted ``snippet``"""
+        raise NotImplementedError
+
+    def posts(self, query):
+        return SearchResults(self, query)
+
+    def _hydrate_posts(self, rows):
+        """Load posts for (id, snippet) rows, keeping the row order"""
+        ids = [row[0] for row in rows]
+        posts = Post.objects.select_related('author', 'topic__category').in_bulk(ids)
+        results = []
+        for post_id, snippet in rows:
+            post = posts.get(post_id)
+            if post is not None:
+                post.snippet = snippet
+                results.append(post)
+        return results
+
+
+class DatabaseBackend(BaseBackend):
+    """Unindexed LIKE search, used where no full-text engine is available"""
+
+    def search_topics(self, query, limit=20):
+        return list(
+            Topic.objects.filter(title__icontains=query)
+            .select_related('author', 'category')[:limit]
+        )
+
+    def _post_queryset(self, query):
+        return Post.objects.filter(content__icontains=query).order_by('-created_at')
+
+    def count_posts(self, query):
+        return self._post_queryset(query).count()
+
+    def search_posts(self, query, offset, limit):
+        posts = list(
+            self._post_queryset(query)
+            .select_related('author', 'topic__category')[offset:offset + limit]
+        )
+        pattern = re.compile(re.escape(query), re.IGNORECASE)
+        for post in posts:
+            match = pattern.search(post.content)
+            start = max(0, match.start() - 80) if match else 0
+            excerpt = post.content[start:start + 200]
+            excerpt = pattern.sub(lambda m: f'{HIGHLIGHT_START}{m.group(0)}{HIGHLIGHT_END}', excerpt)
+            post.snippet = highlight(excerpt)
+        return posts
+
+
+class SQLiteFTSBackend(BaseBackend):
+    """FTS5 indexes with bm25 ranking, keyed by the topic/post primary keys"""
+
+    topic_table = f'{Topic._meta.db_table}_fts'
+    post_table = f'{Post._meta.db_table}_fts'
+
+    def create_tables(self, using=DEFAULT_DB_ALIAS):
+        """
+        Create the FTS5 tables, called after migrate so requests never run
+        DDL. Tables that are new or still empty while there are topics are
+        filled, so existing posts are searchable without a manual rebuild.
+        """
+        with connections[using].cursor() as cursor:
+            self._create(cursor)
+            cursor.execute(
+                f"SELECT EXISTS (SELECT 1 FROM {Topic._meta.db_table}) "
+                f"AND NOT EXISTS (SELECT 1 FROM {self.topic_table})"
+            )
+            if cursor.fetchone()[0]:
+                self._fill(cursor)
+
+    def _create(self, cursor):
+        cursor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {self.topic_table} "
+            f"USING fts5(title, tokenize='porter unicode61')"
+        )
+        cursor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {self.post_table} "
+            f"USING fts5(content, tokenize='porter unicode61')"
+        )
+
+    def _fill(self, cursor):
+        cursor.execute(f"DELETE FROM {self.topic_table}")
+        cursor.execute(
+            f"INSERT INTO {self.topic_table} (rowid, title) "
+            f"SELECT id, title FROM {Topic._meta.db_table}"
+        )
+        cursor.execute(f"DELETE FROM {self.post_table}")
+        cursor.execute(
+            f"INSERT INTO {self.post_table} (rowid, content) "
+            f"SELECT id, content FROM {Post._meta.db_table}"
+        )
+        cursor.execute(f"INSERT INTO {self.topic_table}({self.topic_table}) VALUES ('optimize')")
+        cursor.execute(f"INSERT INTO {self.post_table}({self.post_table}) VALUES ('optimize')")
+
+    @staticmethod
+    def match_expression(query):
+        """Turn free text into an FTS5 query: every word must match, as a prefix"""
+        words = WORD_RE.findall(query)
+        return ' '.join(f'"{word}"*' for word in words)
+
+    def _replace(self, table, column, rowid, text):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {table} WHERE rowid = %s", [rowid])
+            cursor.execute(f"INSERT INTO {table} (rowid, {column}) VALUES (%s, %s)", [rowid, text])
+
+    def _delete(self, table, rowid):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {table} WHERE rowid = %s", [rowid])
+
+    def index_topic(self, topic):
+        self._replace(self.topic_table, 'title', topic.pk, topic.title)
+
+    def remove_topic(self, topic_id):
+        self._delete(self.topic_table, topic_id)
+
+    def index_post(self, post):
+        self._replace(self.post_table, 'content', post.pk, post.content)
+
+    def remove_post(self, post_id):
+        self._delete(self.post_table, post_id)
+
+    def rebuild(self):
+        with connection.cursor() as cursor:
+            self._create(cursor)
+            self._fill(cursor)
+
+    def search_topics(self, query, limit=20):
+        match = self.match_expression(query)
+        if not match:
+            return []
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT rowid FROM {self.topic_table} WHERE {self.topic_table} MATCH %s "
+                f"ORDER BY rank LIMIT %s",
+                [match, limit],
+            )
+            ids = [row[0] for row in cursor.fetchall()]
+        topics = Topic.objects.select_related('author', 'category').in_bulk(ids)
+        return [topics[pk] for pk in ids if pk in topics]
+
+    def count_posts(self, query):
+        match = self.match_expression(query)
+        if not match:
+            return 0
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT COUNT(*) FROM {self.post_table} WHERE {self.post_table} MATCH %s",
+                [match],
+            )
+            return cursor.fetchone()[0]
+
+    def search_posts(self, query, offset, limit):
+        match = self.match_expression(query)
+        if not match:
+            return []
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT rowid, snippet({self.post_table}, 0, %s, %s, '…', 32) "
+                f"FROM {self.post_table} WHERE {self.post_table} MATCH %s "
+                f"ORDER BY rank LIMIT %s OFFSET %s",
+                [HIGHLIGHT_START, HIGHLIGHT_END, match, limit, offset],
+            )
+            rows = [(rowid, highlight(snippet)) for rowid, snippet in cursor.fetchall()]
+        return self._hydrate_posts(rows)
+
+
+def sqlite_has_fts5():
+    if connection.vendor != 'sqlite':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')")
+        return bool(cursor.fetchone()[0])
+
+
+_backend = None
+
+
+def get_backend():
+    """Return the configured search backend, picking FTS5 on SQLite by default"""
+    global _backend
+    if _backend is None:
+        backend_path = getattr(settings, 'FORUM_SEARCH_BACKEND', None)
+        if backend_path:
+            _backend = import_string(backend_path)()
+        elif sqlite_has_fts5():
+            _backend = SQLiteFTSBackend()
+        else:
+            _backend = DatabaseBackend()
+    return _backend
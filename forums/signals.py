@@ -0,0 +1,104 @@
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import post_init, post_save, post_delete
+from django.dispatch import receiver
+
+from nxgen.pagecache import invalidate_tags
+
+from .models import Category, Topic, Post, last_post_expressions
+from .search import get_backend
+
+@receiver(post_init, sender=Topic)
+def remember_topic_category(sender, instance, **kwargs):
+    """Keep the category as loaded so a moved topic can carry its counts along"""
+    instance._saved_category_id = instance.category_id if instance.pk else None
+
+@receiver(post_save, sender=Topic)
+def update_counts_on_topic_save(sender, instance, created, **kwargs):
+    """Count new topics, and move counts between categories when a topic is moved"""
+    old_category_id = instance._saved_category_id
+    instance._saved_category_id = instance.category_id
+    
+    if created:
+        Category.objects.filter(pk=instance.category_id).update(topic_count=F('topic_count') + 1)
+    elif old_category_id is not None and old_category_id != instance.category_id:
+        with transaction.atomic():
+            # The instance may hold a stale count, read the maintained one
+            post_count = Topic.objects.filter(pk=instance.pk).values_list('post_count', flat=True).get()
+            Category.objects.filter(pk=old_category_id).update(
+                topic_count=F('topic_count') - 1,
+                post_count=F('post_count') - post_count,
+            )
+            Category.objects.filter(pk=instance.category_id).update(
+                topic_count=F('topic_count') + 1,
+                post_count=F('post_count') + post_count,
+            )
+
+@receiver(post_delete, sender=Topic)
+def update_counts_on_topic_delete(sender, instance, **kwargs):
+    """Remove a deleted topic from its category's topic count"""
+    # The posts of the topic are deleted first and already decremented post_count
+    Category.objects.filter(pk=instance.category_id).update(topic_count=F('topic_count') - 1)
+
+def content_saved(update_fields):
+    return update_fields is None or 'content' in update_fields
+
+@receiver(post_save, sender=Post)
+def update_counts_on_post_save(sender, instance, created, update_fields=None, **kwargs):
+    """Count a new post and make it the topic's last post, or bump the topic on edits"""
+    if not created:
+        if content_saved(update_fields):
+            Topic.objects.filter(pk=instance.topic_id).update(updated_at=instance.updated_at)
+        return
+    
+    with transaction.atomic():
+        Topic.objects.filter(pk=instance.topic_id).update(
+            post_count=F('post_count') + 1,
+            last_post=instance.pk,
+            last_post_at=instance.created_at,
+            updated_at=instance.created_at,
+        )
+        Category.objects.filter(topics=instance.topic_id).update(post_count=F('post_count') + 1)
+
+@receiver(post_delete, sender=Post)
+def update_counts_on_post_delete(sender, instance, **kwargs):
+    """Remove a deleted post from the counts and re-point the topic's last post"""
+    with transaction.atomic():
+        Topic.objects.filter(pk=instance.topic_id).update(
+            post_count=F('post_count') - 1,
+            **last_post_expressions(),
+        )
+        Category.objects.filter(topics=instance.topic_id).update(post_count=F('post_count') - 1)
+
+def create_search_tables(sender, using, **kwargs):
+    """Connected to post_migrate in ForumsConfig.ready"""
+    get_backend().create_tables(using)
+
+@receiver(post_save, sender=Topic)
+def index_topic(sender, instance, **kwargs):
+    """Keep the search index in step with the topic title"""
+    get_backend().index_topic(instance)
+
+@receiver(post_delete, sender=Topic)
+def unindex_topic(sender, instance, **kwargs):
+    get_backend().remove_topic(instance.pk)
+
+@receiver(post_save, sender=Post)
+def index_post(sender, instance, update_fields=None, **kwargs):
+    """Keep the search index in step with the post content"""
+    if content_saved(update_fields):
+        get_backend().index_post(instance)
+
+@receiver(post_delete, sender=Post)
+def unindex_post(sender, instance, **kwargs):
+    get_backend().remove_post(instance.pk)
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=Topic)
+@receiver(post_delete, sender=Topic)
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_forum_pages(sender, **kwargs):
+    """Drop the cached forum home page"""
+    invalidate_tags('forums')
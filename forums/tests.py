@@ -1,3 +1,164 @@
-from django.test import TestCase
+from datetime import timedelta
 
-# Create your tests here.
+from django.contrib.auth.models import AnonymousUser, User
+from django.core.cache import cache
+from django.db import connection
+from django.test import RequestFactory, TestCase
+from django.urls import reverse
+
+from accounts.models import Profile
+
+from .models import Category, Topic, TopicView, Post
+from .search import SQLiteFTSBackend, sqlite_has_fts5
+
+
+class ForumQueryCountTests(TestCase):
+    """The forum pages run a fixed number of queries however much they list"""
+
+    def setUp(self):
+        # Anonymous pages are served from the page cache after the first hit
+        cache.clear()
+
+    def make_user(self, username):
+        user = User.objects.create_user(username, password='secret')
+        Profile.objects.create(user=user)
+        return user
+
+    def populate(self, categories, topics, posts):
+        """Create categories with topics, each topic with posts by distinct authors"""
+        start = User.objects.count()
+        authors = [self.make_user(f'author{start + i}') for i in range(posts)]
+        for c in range(categories):
+            category = Category.objects.create(name=f'Category {start}-{c}', description='About things')
+            for t in range(topics):
+                topic = Topic.objects.create(title=f'Topic {start}-{c}-{t}', category=category, author=authors[0])
+                for author in authors:
+                    Post.objects.create(topic=topic, author=author, content=f'Post by {author.username}')
+        return category, topic
+
+    def test_forum_home(self):
+        self.populate(categories=1, topics=1, posts=1)
+        with self.assertNumQueries(5):
+            self.client.get(reverse('forums:forum_home'))
+
+        cache.clear()
+        category, _ = self.populate(categories=6, topics=3, posts=2)
+        with self.assertNumQueries(5):
+            response = self.client.get(reverse('forums:forum_home'))
+        self.assertContains(response, category.name)
+
+    def test_category_detail(self):
+        category, _ = self.populate(categories=1, topics=1, posts=1)
+        with self.assertNumQueries(3):
+            self.client.get(reverse('forums:category_detail', kwargs={'slug': category.slug}))
+
+        category, _ = self.populate(categories=1, topics=20, posts=3)
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('forums:category_detail', kwargs={'slug': category.slug}))
+        self.assertEqual(len(response.context['page_obj']), 20)
+
+    def test_counters_follow_posts(self):
+        category, topic = self.populate(categories=1, topics=2, posts=3)
+        category.refresh_from_db()
+        topic.refresh_from_db()
+        self.assertEqual((category.topic_count, category.post_count), (2, 6))
+        self.assertEqual(topic.post_count, 3)
+        self.assertEqual(topic.last_post, topic.posts.order_by('-created_at', '-pk').first())
+
+        topic.posts.last().delete()
+        category.refresh_from_db()
+        topic.refresh_from_db()
+        self.assertEqual((category.post_count, topic.post_count), (5, 2))
+
+    def test_topic_detail(self):
+        _, topic = self.populate(categories=1, topics=1, posts=1)
+        url = reverse('forums:topic_detail', kwargs={'category_slug': topic.category.slug, 'slug': topic.slug})
+        with self.assertNumQueries(4):
+            self.client.get(url)
+
+        # A full page of posts by 15 different authors costs the same
+        authors = [self.make_user(f'poster{i}') for i in range(14)]
+        for author in authors:
+            Post.objects.create(topic=topic, author=author, content='Another reply')
+        with self.assertNumQueries(4):
+            response = self.client.get(url)
+        self.assertEqual(len(response.context['page_obj']), 15)
+        self.assertEqual({post.author_post_count for post in response.context['page_obj']}, {1})
+
+
+class PostEditTests(TestCase):
+    def setUp(self):
+        author = User.objects.create_user('writer')
+        category = Category.objects.create(name='General')
+        topic = Topic.objects.create(title='Hello', category=category, author=author)
+        self.post = Post.objects.create(topic=topic, author=author, content='First *draft*')
+        # Old enough for a change to count as an edit
+        Post.objects.filter(pk=self.post.pk).update(created_at=self.post.created_at - timedelta(hours=1))
+        self.post.refresh_from_db()
+
+    def test_content_change_marks_edited(self):
+        self.post.content = 'Second draft'
+        self.post.save()
+        self.post.refresh_from_db()
+        self.assertTrue(self.post.edited)
+        self.assertEqual(self.post.content_html, 'Second draft')
+
+    def test_unchanged_save_is_not_an_edit(self):
+        self.post.save()
+        self.post.refresh_from_db()
+        self.assertFalse(self.post.edited)
+
+    def test_unchanged_save_skips_rendering(self):
+        # Only the UPDATE of the other columns, no re-render or re-index
+        with self.assertNumQueries(1):
+            self.post.save()
+
+    def test_missing_hash_is_not_an_edit(self):
+        # A post stored before content hashes existed
+        Post.objects.filter(pk=self.post.pk).update(content_hash='', content_html='')
+        self.post.refresh_from_db()
+        self.post.save()
+        self.post.refresh_from_db()
+        self.assertFalse(self.post.edited)
+        self.assertEqual(self.post.content_html, 'First <em>draft</em>')
+        self.assertTrue(self.post.content_hash)
+
+
+class TopicViewTests(TestCase):
+    def test_anonymous_views_need_an_address(self):
+        user = User.objects.create_user('reader')
+        topic = Topic.objects.create(title='Hello', category=Category.objects.create(name='General'), author=user)
+        request = RequestFactory().get('/')
+        request.user = AnonymousUser()
+
+        del request.META['REMOTE_ADDR']
+        TopicView.record(topic, request)
+        self.assertFalse(TopicView.objects.exists())
+
+        request.META['REMOTE_ADDR'] = '10.0.0.1'
+        TopicView.record(topic, request)
+        TopicView.record(topic, request)
+        request.user = user
+        TopicView.record(topic, request)
+        self.assertEqual(topic.views.count(), 2)
+        self.assertTrue(topic.views.filter(user=None, ip_address='10.0.0.1').exists())
+        self.assertTrue(topic.views.filter(user=user).exists())
+
+
+class FTSIndexTests(TestCase):
+    def test_migrate_indexes_existing_posts(self):
+        if not sqlite_has_fts5():
+            self.skipTest('needs SQLite with FTS5')
+        author = User.objects.create_user('writer')
+        topic = Topic.objects.create(title='Deploying', category=Category.objects.create(name='General'), author=author)
+        Post.objects.create(topic=topic, author=author, content='Gunicorn behind nginx')
+        backend = SQLiteFTSBackend()
+        # Posts stored before the index existed
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {backend.topic_table}")
+            cursor.execute(f"DELETE FROM {backend.post_table}")
+        self.assertEqual(backend.count_posts('nginx'), 0)
+
+        backend.create_tables()
+        self.assertEqual(backend.count_posts('nginx'), 1)
+        self.assertEqual(backend.search_topics('deploy'), [topic])
@@ -1,20 +1,25 @@
+from django.conf import settings
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.db.models import Count, Q
 from django.core.paginator import Paginator
 from django.utils.text import slugify
+from analytics.counters import topic_views
+from nxgen.pagecache import cache_page_by_tags
 from .models import Category, Topic, Post, TopicView
 from .forms import TopicForm, PostForm
+from .search import get_backend
 
+@cache_page_by_tags('forums')
 def forum_home(request):
     """Display all categories and some stats"""
     categories = Category.objects.all()
     
-    
-    total_topics = Topic.objects.count()
-    total_posts = Post.objects.count()
-    total_users = Post.objects.values('author').distinct().count()
+    # Passed uncalled so the counts only run when the cached fragment is rebuilt
+    total_topics = Topic.objects.count
+    total_posts = Post.objects.count
+    total_users = Post.objects.values('author').distinct().count
     
     recent_topics = Topic.objects.select_related('author', 'category').order_by('-created_at')[:5]
     
@@ -30,7 +35,7 @@ def forum_home(request):
 def category_detail(request, slug):
     """Display all topics in a category"""
     category = get_object_or_404(Category, slug=slug)
-    topics = Topic.objects.filter(category=category).select_related('author')
+    topics = Topic.objects.filter(category=category).select_related('author', 'category', 'last_post__author')
     
     
     query = request.GET.get('q')
@@ -51,22 +56,30 @@ def category_detail(request, slug):
 
 def topic_detail(request, category_slug, slug):
     """Display a topic and its posts"""
-    topic = get_object_or_404(Topic, slug=slug, category__slug=category_slug)
-    posts = topic.posts.select_related('author').all()
+    topic = get_object_or_404(Topic.objects.select_related('category'), slug=slug, category__slug=category_slug)
+    posts = topic.posts.select_related('author__profile').all()
     
     
-    if request.user.is_authenticated:
-        TopicView.objects.get_or_create(topic=topic, user=request.user)
-    else:
-        ip_address = request.META.get('REMOTE_ADDR')
-        if ip_address:
-            TopicView.objects.get_or_create(topic=topic, ip_address=ip_address)
+    topic_views.record(topic.pk, request)
+    if settings.FORUM_RECORD_TOPIC_VIEWS:
+        TopicView.record(topic, request)
     
     
     paginator = Paginator(posts, 15)  
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
     
+    # Post counts for every author on the page in one grouped query
+    author_ids = {post.author_id for post in page_obj}
+    post_counts = dict(
+        Post.objects.filter(author_id__in=author_ids)
+        .values('author')
+        .annotate(n=Count('pk'))
+        .values_list('author', 'n')
+    )
+    for post in page_obj:
+        post.author_post_count = post_counts.get(post.author_id, 0)
+    
     
     form = PostForm()
     
@@ -181,18 +194,20 @@ def search(request):
     query = request.GET.get('q', '')
     
     if query:
-        
-        topics = Topic.objects.filter(title__icontains=query).select_related('author', 'category')
-        
-        
-        posts = Post.objects.filter(content__icontains=query).select_related('author', 'topic')
+        backend = get_backend()
+        topics = backend.search_topics(query, limit=20)
+        posts = backend.posts(query)
     else:
-        topics = Topic.objects.none()
-        posts = Post.objects.none()
+        topics = []
+        posts = []
+    
+    paginator = Paginator(posts, 20)
+    page_number = request.GET.get('page')
+    page_obj = paginator.get_page(page_number)
     
     context = {
         'query': query,
-        'topics': topics[:20],  
-        'posts': posts[:20],    
+        'topics': topics,
+        'page_obj': page_obj,
     }
     return render(request, 'forums/search_results.html', context)
@@ -0,0 +1,22 @@
+"""
+Protection for denormalized counter columns.
+
+Counters such as ``post_count`` or ``confirmed_count`` are maintained with
+``UPDATE ... SET n = n + 1`` statements from signals and views, so the copy
+held by a model instance goes stale as soon as anything else touches the
+row. A plain ``save()`` of that instance would write the stale value back.
+"""
+
+
+def protect_counters(instance, counter_fields, kwargs):
+    """
+    Turn a full save() of an existing row into an update of every other
+    field, so a stale instance can't overwrite the signal-maintained counters.
+    Returns the save() keyword arguments.
+    """
+    if not instance._state.adding and kwargs.get('update_fields') is None and not kwargs.get('force_insert'):
+        kwargs['update_fields'] = [
+            field.name for field in instance._meta.concrete_fields
+            if not field.primary_key and field.name not in counter_fields
+        ]
+    return kwargs
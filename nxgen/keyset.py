@@ -0,0 +1,42 @@
+"""
+Keyset pagination over a newest-first ``(timestamp, id)`` ordering.
+
+A page is addressed by an opaque cursor holding the position of a row
+instead of an offset, so every page costs one indexed query however deep
+it is. Querysets must be ordered by ``-<field>, -id`` (or the reverse for
+``seek_before``) with an index on the same columns.
+"""
+
+from django.utils.dateparse import parse_datetime
+from django.utils.http import urlsafe_base64_decode, urlsafe_base64_encode
+
+
+def encode_cursor(obj, field='created_at'):
+    """Opaque cursor for ``obj``'s position in the ordering by ``field``"""
+    return urlsafe_base64_encode(f"{getattr(obj, field).isoformat()}|{obj.pk}".encode())
+
+
+def decode_cursor(cursor):
+    """The (timestamp, pk) position of a cursor, or None if it is missing or invalid"""
+    if not cursor:
+        return None
+    try:
+        value, pk = urlsafe_base64_decode(cursor).decode().split('|')
+        value, pk = parse_datetime(value), int(pk)
+    except (ValueError, TypeError):
+        return None
+    return (value, pk) if value else None
+
+
+def seek_after(queryset, position, field='created_at'):
+    """Rows that come after ``position`` in newest-first order"""
+    value, pk = position
+    # Spelled as a range plus an exclusion rather than an OR so the
+    # database can seek the index on (field, id)
+    return queryset.filter(**{f'{field}__lte': value}).exclude(**{field: value, 'pk__gte': pk})
+
+
+def seek_before(queryset, position, field='created_at'):
+    """Rows that come before ``position`` in newest-first order, for ascending querysets"""
+    value, pk = position
+    return queryset.filter(**{f'{field}__gte': value}).exclude(**{field: value, 'pk__lte': pk})
@@ -0,0 +1,113 @@
+"""
+Tag-invalidated page cache for the public listing pages.
+
+Every cached page depends on a few tags (``'courses'``, ``'events'``,
+``'forums'``, ``'projects'``). Each tag has a version stored in the cache,
+and the versions of a page's tags are part of its cache key, so
+``invalidate_tags`` only has to replace the version: every page and
+fragment built from the old one stops being looked up and ages out. The
+apps call it from their model signals.
+
+Anonymous GET requests are answered with the whole cached response, keyed
+by absolute URL. Pages for signed-in users are still rendered per request,
+but their templates wrap the shared parts in ``{% cache %}`` blocks keyed
+by ``request.page_cache.version``.
+
+Only the get/get_many/add/set cache operations are used, so any backend
+works, including local-memory and file-based caches.
+"""
+
+import hashlib
+import time
+from collections import namedtuple
+from functools import wraps
+
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.core.cache import cache
+from django.http import HttpResponse
+
+TAG_VERSION_KEY = 'pagecache:tag:{}'
+PAGE_KEY = 'pagecache:page:{}:{}'
+
+PageCache = namedtuple('PageCache', ['version', 'timeout'])
+
+
+def tag_version(tags):
+    """Combined current version of ``tags``, for use in cache keys"""
+    if not tags:
+        return '0'
+    keys = [TAG_VERSION_KEY.format(tag) for tag in tags]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            # A tag seen for the first time (or evicted) gets a fresh version,
+            # so pages cached before an eviction are never served again
+            cache.add(key, time.time_ns(), None)
+            versions[key] = cache.get(key)
+    return hashlib.md5('|'.join(str(versions[key]) for key in keys).encode()).hexdigest()
+
+
+def invalidate_tags(*tags):
+    """Drop every page and fragment that depends on any of ``tags``"""
+    version = time.time_ns()
+    cache.set_many({TAG_VERSION_KEY.format(tag): version for tag in tags}, None)
+
+
+def _page_key(request, version):
+    url = hashlib.md5(request.build_absolute_uri().encode()).hexdigest()
+    return PAGE_KEY.format(url, version)
+
+
+def _can_serve_cached(request):
+    # Flash messages are rendered into the page, so a visitor with pending
+    # messages always gets a fresh one
+    return (
+        request.method in ('GET', 'HEAD')
+        and not request.user.is_authenticated
+        and not len(get_messages(request))
+    )
+
+
+def _can_store(request, response):
+    # A page that used a CSRF token or sets cookies belongs to one visitor
+    return (
+        request.method == 'GET'
+        and response.status_code == 200
+        and not response.streaming
+        and not response.cookies
+        and not request.META.get('CSRF_COOKIE_NEEDS_UPDATE')
+    )
+
+
+def cache_page_by_tags(*tags, timeout=None):
+    """
+    Cache anonymous responses of a view until one of ``tags`` is invalidated
+    or ``timeout`` (default PAGE_CACHE_TIMEOUT) expires, and expose the tag
+    version to templates as ``request.page_cache``.
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapped(request, *args, **kwargs):
+            page_timeout = settings.PAGE_CACHE_TIMEOUT if timeout is None else timeout
+            request.page_cache = PageCache(tag_version(tags), page_timeout)
+            if not _can_serve_cached(request):
+                return view_func(request, *args, **kwargs)
+
+            key = _page_key(request, request.page_cache.version)
+            cached = cache.get(key)
+            if cached is not None:
+                content, headers = cached
+                response = HttpResponse(content, headers=headers)
+                response['X-Page-Cache'] = 'hit'
+                return response
+
+            response = view_func(request, *args, **kwargs)
+            if callable(getattr(response, 'render', None)):
+                response = response.render()
+            if _can_store(request, response):
+                cache.set(key, (response.content, dict(response.headers)), page_timeout)
+                response['X-Page-Cache'] = 'miss'
+            return response
+        return wrapped
+    return decorator
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.2/ref/settings/
 """
 
+import sys
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -53,6 +54,9 @@ INSTALLED_APPS = [
     "forums", 
     "courses",  
     "projects",
+    "analytics",
+    "search",
+    "recommendations",
 ]
 
 # If using crispy forms
@@ -154,6 +158,49 @@ LOGIN_REDIRECT_URL = '/accounts/profile/'
 LOGIN_URL = 'login'
 
 
+# Running under "manage.py test"
+TESTING = sys.argv[1:2] == ['test']
+
+# Buffered view counters (see analytics/counters.py)
+# No background flusher in tests, it would flush into the real database at exit
+VIEW_COUNT_FLUSH_INTERVAL = 0 if TESTING else 30  # seconds between background flushes, 0 disables
+VIEW_COUNT_CACHE = 'viewcounts'  # cache alias for pending counts, must not cull them
+VIEW_COUNT_DEDUP_WINDOW = 60 * 30  # ignore repeat views by the same visitor for 30 minutes
+FORUM_RECORD_TOPIC_VIEWS = False  # also keep exact per-user TopicView rows (one write per view)
+
+# GitHub README cache for projects (see projects/readme.py)
+PROJECT_README_TIMEOUT = (3.05, 10)  # connect/read timeouts in seconds
+PROJECT_README_MAX_AGE = 60 * 60 * 6  # revalidate cached READMEs after 6 hours
+PROJECT_README_WORKERS = 2  # background fetch threads per process
+PROJECT_README_ERROR_BACKOFF = 60 * 5  # seconds before a page view retries a failed fetch
+PROJECT_TRENDING_EPOCH = '2025-01-01'  # see projects/models.py before changing; run recount_project_likes after
+
+# Recommendation refreshes (see recommendations/tasks.py)
+RECOMMENDATION_WORKERS = 0 if TESTING else 1  # background refresh threads per process, 0 refreshes inline
+
+
+# Caching
+# Local memory by default; point this at a shared backend (Redis, Memcached,
+# database) when running more than one process
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "nxgen",
+        "OPTIONS": {"MAX_ENTRIES": 10000},
+    },
+    # Buffered view counts: one entry per object with views pending, sized
+    # so they are never culled before a flush (see analytics/counters.py)
+    "viewcounts": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "nxgen-viewcounts",
+        "OPTIONS": {"MAX_ENTRIES": 1000000},
+    },
+}
+
+# Public listing pages (see nxgen/pagecache.py)
+PAGE_CACHE_TIMEOUT = 60 * 5  # anonymous pages and shared fragments, in seconds
+
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
 
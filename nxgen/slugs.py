@@ -0,0 +1,62 @@
+"""
+Unique slug generation shared by every model with a unique ``slug`` field.
+
+The next free ``-N`` suffix is found with a single prefix query instead of
+probing candidates one by one, and the insert is retried if another request
+takes the slug between that query and the save.
+"""
+
+import re
+
+from django.db import IntegrityError, transaction
+from django.utils.text import slugify
+
+# Room kept for a "-N" suffix when the base slug is cut to the field length
+SUFFIX_RESERVE = 8
+MAX_ATTEMPTS = 3
+
+
+def unique_slug(instance, value, field_name='slug'):
+    """Return a slug for ``value`` that no other row of the instance's model uses"""
+    model = type(instance)
+    max_length = model._meta.get_field(field_name).max_length
+    base = slugify(value)[:max_length].strip('-') or model._meta.model_name
+    stem = base[:max_length - SUFFIX_RESERVE].strip('-')
+
+    taken = model._default_manager.filter(**{f'{field_name}__startswith': stem})
+    if instance.pk is not None:
+        taken = taken.exclude(pk=instance.pk)
+    taken = set(taken.values_list(field_name, flat=True))
+    if base not in taken:
+        return base
+
+    pattern = re.compile(rf'^{re.escape(stem)}-(\d+)$')
+    suffixes = [int(match.group(1)) for match in map(pattern.match, taken) if match]
+    return f'{stem}-{max(suffixes, default=0) + 1}'
+
+
+class UniqueSlugMixin:
+    """
+    Fill in ``slug`` from ``slug_source`` when it is empty, and make the slug
+    of a new row unique, retrying on a conflicting concurrent insert.
+    """
+    slug_source = 'title'
+
+    def save(self, *args, **kwargs):
+        adding = self._state.adding
+        if not self.slug:
+            self.slug = unique_slug(self, getattr(self, self.slug_source))
+        elif adding:
+            self.slug = unique_slug(self, self.slug)
+        if not adding:
+            return super().save(*args, **kwargs)
+
+        for attempt in range(MAX_ATTEMPTS):
+            try:
+                with transaction.atomic():
+                    return super().save(*args, **kwargs)
+            except IntegrityError:
+                model = type(self)
+                if attempt + 1 == MAX_ATTEMPTS or not model._default_manager.filter(slug=self.slug).exists():
+                    raise
+                self.slug = unique_slug(self, self.slug)
@@ -39,6 +39,7 @@ urlpatterns = [
     path('courses/', include('courses.urls', namespace='courses')),  # Add this line
     path('projects/', include('projects.urls', namespace='projects')),
     path('events/', include('events.urls')),
+    path('search/', include('search.urls', namespace='search')),
 ]
 
 # Always include media files URL pattern regardless of DEBUG setting
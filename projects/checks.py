@@ -0,0 +1,20 @@
+from datetime import timedelta
+
+from django.core.checks import Warning, register
+from django.utils import timezone
+
+
+@register()
+def check_trending_epoch(app_configs, **kwargs):
+    """Warn in the year before trending scores would overflow (see projects.models)"""
+    from .models import TRENDING_HORIZON
+
+    if timezone.now() < TRENDING_HORIZON - timedelta(days=365):
+        return []
+    return [
+        Warning(
+            f'Project trending scores overflow after {TRENDING_HORIZON:%Y-%m-%d}.',
+            hint='Move PROJECT_TRENDING_EPOCH to a recent date and run recount_project_likes.',
+            id='projects.W001',
+        )
+    ]
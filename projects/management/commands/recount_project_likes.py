@@ -0,0 +1,28 @@
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from projects.models import Like, Project, trending_weight
+
+
+class Command(BaseCommand):
+    help = (
+        'Rebuild the denormalized like_count/trending_score columns on Project. '
+        'Run it right after changing PROJECT_TRENDING_EPOCH.'
+    )
+
+    def handle(self, *args, **options):
+        totals = defaultdict(lambda: [0, 0.0])
+        for project_id, created_at in Like.objects.values_list('project_id', 'created_at').iterator():
+            totals[project_id][0] += 1
+            totals[project_id][1] += trending_weight(created_at)
+
+        with transaction.atomic():
+            Project.objects.update(like_count=0, trending_score=0)
+            projects = [
+                Project(pk=pk, like_count=count, trending_score=score)
+                for pk, (count, score) in totals.items()
+            ]
+            Project.objects.bulk_update(projects, ['like_count', 'trending_score'], batch_size=500)
+        self.stdout.write(self.style.SUCCESS(f'Recounted likes for {len(projects)} projects'))
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from django.utils import timezone
+
+from projects.models import Project
+from projects.readme import MAX_AGE, refresh_readme
+
+
+class Command(BaseCommand):
+    help = 'Fetch GitHub READMEs for projects whose cached copy is missing or stale'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true',
+                            help='Revalidate every README, not only the stale ones')
+
+    def handle(self, *args, **options):
+        projects = Project.objects.exclude(github_link__isnull=True).exclude(github_link='')
+        if not options['all']:
+            cutoff = timezone.now() - MAX_AGE
+            projects = projects.filter(
+                Q(readme__isnull=True) | Q(readme__fetched_at__isnull=True) | Q(readme__fetched_at__lt=cutoff)
+            )
+
+        refreshed = 0
+        for project in projects.iterator():
+            readme = refresh_readme(project)
+            refreshed += 1
+            self.stdout.write(f'{project.title}: {readme.status_code or "error"}')
+        self.stdout.write(self.style.SUCCESS(f'Refreshed {refreshed} READMEs'))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from projects.models import Project
+
+
+class Command(BaseCommand):
+    help = 'Parse every project tech_stack into Technology tags and project links'
+
+    def handle(self, *args, **options):
+        synced = 0
+        for project in Project.objects.only('pk', 'tech_stack').iterator():
+            project.sync_technologies()
+            synced += 1
+        self.stdout.write(self.style.SUCCESS(f'Synced technologies for {synced} projects'))
@@ -1,8 +1,111 @@
-from django.db import models
+from datetime import date, datetime, time, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, models, transaction
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
 from django.contrib.auth.models import User
+from django.utils import timezone
+from django.utils.functional import cached_property
 from django.utils.text import slugify
 
-class Project(models.Model):
+from nxgen.counters import protect_counters
+from nxgen.slugs import UniqueSlugMixin
+
+TAG_COUNTS_CACHE_KEY = 'projects:tag_counts'
+TAG_COUNTS_TIMEOUT = 60 * 5
+
+# Trending scores: every like adds 2 ** ((liked_at - epoch) / half_life), so
+# a like is worth half as much as one given a half-life later. Sorting by the
+# stored sum is the same as sorting by the decayed score, and it never needs
+# recomputing as time passes.
+#
+# The weights double every half-life and a float tops out at 2 ** 1024, so
+# scores can only be kept for about 1000 half-lives (19 years at 7 days)
+# after the epoch. Well before TRENDING_HORIZON, move PROJECT_TRENDING_EPOCH
+# forward and run recount_project_likes, which rebuilds every score against
+# the new epoch; the projects.W001 check warns in the final year.
+TRENDING_EPOCH = datetime.combine(
+    date.fromisoformat(getattr(settings, 'PROJECT_TRENDING_EPOCH', '2025-01-01')),
+    time.min, tzinfo=dt_timezone.utc,
+)
+TRENDING_HALF_LIFE = timedelta(days=7)
+# Leaves 2 ** 23 likes' worth of headroom below the float limit
+TRENDING_HORIZON = TRENDING_EPOCH + 1000 * TRENDING_HALF_LIFE
+
+
+def trending_weight(when):
+    return 2 ** ((when - TRENDING_EPOCH) / TRENDING_HALF_LIFE)
+
+
+def _count_subquery(queryset, outer_field):
+    """Correlated COUNT(*) so several counts can be computed without join fan-out"""
+    return Coalesce(
+        Subquery(
+            queryset.filter(**{outer_field: OuterRef('pk')})
+            .order_by()
+            .values(outer_field)
+            .annotate(total=Count('pk'))
+            .values('total'),
+            output_field=IntegerField(),
+        ),
+        0,
+    )
+
+
+def technology_slug(name):
+    """Normalized key for a technology name, so 'Django' and 'django ' are one tag"""
+    name = name.strip().lower().replace('+', ' plus').replace('#', ' sharp')
+    return slugify(name)
+
+
+class Technology(models.Model):
+    name = models.CharField(max_length=50)
+    slug = models.SlugField(max_length=60, unique=True)
+
+    class Meta:
+        ordering = ['name']
+        verbose_name_plural = 'technologies'
+
+    def __str__(self):
+        return self.name
+
+    @classmethod
+    def tag_counts(cls, limit=30):
+        """
+        (name, slug, project count) for the most used technologies, for the
+        tag cloud. Cached until a project's technologies change.
+        """
+        counts = cache.get(TAG_COUNTS_CACHE_KEY)
+        if counts is None:
+            counts = list(
+                cls.objects.annotate(num_projects=Count('project_links'))
+                .filter(num_projects__gt=0)
+                .order_by('-num_projects', 'name')
+                .values_list('name', 'slug', 'num_projects')[:100]
+            )
+            cache.set(TAG_COUNTS_CACHE_KEY, counts, TAG_COUNTS_TIMEOUT)
+        return counts[:limit]
+
+
+class ProjectQuerySet(models.QuerySet):
+    def gallery(self):
+        """Projects as shown on gallery cards: author loaded, comment counts annotated"""
+        return self.select_related('created_by').annotate(
+            num_comments=_count_subquery(Comment.objects.all(), 'project'),
+        ).order_by('-created_at', '-id')
+
+    def trending(self):
+        """Most liked projects, recent likes weighing more than old ones"""
+        return self.filter(like_count__gt=0).select_related('created_by').order_by('-trending_score', '-id')
+
+    def using_technology(self, name):
+        """Projects tagged with a technology, looked up through the indexed link table"""
+        return self.filter(technology_links__technology__slug=technology_slug(name))
+
+
+class Project(UniqueSlugMixin, models.Model):
     title = models.CharField(max_length=255)
     description = models.TextField()
     github_link = models.URLField(max_length=500, blank=True, null=True)
@@ -13,15 +116,92 @@ class Project(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     is_seeking_collaborators = models.BooleanField(default=False)
     slug = models.SlugField(unique=True, blank=True)
-    
+    technologies = models.ManyToManyField(Technology, through='ProjectTechnology', related_name='projects', blank=True)
+
+    # Maintained by the Like signals in projects.signals
+    like_count = models.PositiveIntegerField(default=0, editable=False)
+    trending_score = models.FloatField(default=0, editable=False, db_index=True)
+
+    COUNTER_FIELDS = ('like_count', 'trending_score')
+
+    objects = ProjectQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Gallery ordering/keyset pagination, with and without the collaborators filter
+            models.Index(fields=['-created_at', '-id']),
+            models.Index(fields=['is_seeking_collaborators', '-created_at', '-id']),
+        ]
+
+    @cached_property
+    def tech_tags(self):
+        """tech_stack split into a list once per instance"""
+        return [tech.strip() for tech in self.tech_stack.split(',') if tech.strip()]
+
     def save(self, *args, **kwargs):
-        if not self.slug:
-            self.slug = slugify(self.title)
-        super().save(*args, **kwargs)
+        super().save(*args, **protect_counters(self, self.COUNTER_FIELDS, kwargs))
+
+    def toggle_like(self, user):
+        """
+        Like the project, or remove the like if ``user`` already liked it.
+        Returns (liked, like_count); the counter is updated in the same
+        transaction by the Like signals.
+        """
+        with transaction.atomic():
+            deleted, _ = Like.objects.filter(project=self, user=user).delete()
+            liked = not deleted
+            if liked:
+                try:
+                    with transaction.atomic():
+                        Like.objects.create(project=self, user=user)
+                except IntegrityError:
+                    pass  # Liked concurrently by another request
+            self.like_count = Project.objects.values_list('like_count', flat=True).get(pk=self.pk)
+        return liked, self.like_count
+
+    @property
+    def trending_now(self):
+        """Decayed score as of now: the number of likes, each halved per half-life of age"""
+        return self.trending_score / trending_weight(timezone.now())
+
+    def sync_technologies(self):
+        """Rebuild the technology links from tech_stack, creating unknown technologies"""
+        self.__dict__.pop('tech_tags', None)
+        names = {}
+        for name in self.tech_tags:
+            names.setdefault(technology_slug(name), name[:50])
+        names.pop('', None)
+
+        known = Technology.objects.in_bulk(list(names), field_name='slug')
+        missing = [Technology(name=name, slug=slug) for slug, name in names.items() if slug not in known]
+        if missing:
+            Technology.objects.bulk_create(missing, ignore_conflicts=True)
+            known = Technology.objects.in_bulk(list(names), field_name='slug')
+
+        ProjectTechnology.objects.filter(project=self).delete()
+        ProjectTechnology.objects.bulk_create([
+            ProjectTechnology(project=self, technology=known[slug], position=position)
+            for position, slug in enumerate(names)
+        ])
+        cache.delete(TAG_COUNTS_CACHE_KEY)
 
     def __str__(self):
         return self.title
 
+class ProjectTechnology(models.Model):
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name="technology_links")
+    technology = models.ForeignKey(Technology, on_delete=models.CASCADE, related_name="project_links")
+    position = models.PositiveSmallIntegerField(default=0)
+
+    class Meta:
+        # technology first, so "projects using X" is an index range scan
+        unique_together = ('technology', 'project')
+        ordering = ['position']
+
+    def __str__(self):
+        return f"{self.project.title} uses {self.technology.name}"
+
+
 class Like(models.Model):
     project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name="likes")
     user = models.ForeignKey(User, on_delete=models.CASCADE)
@@ -41,3 +221,24 @@ class Comment(models.Model):
 
     def __str__(self):
         return f"Comment by {self.user.username} on {self.project.title}"
+
+class ProjectReadme(models.Model):
+    """
+    Cached copy of a project's GitHub README, refreshed in the background by
+    projects.readme so project pages never wait on GitHub.
+    """
+    project = models.OneToOneField(Project, on_delete=models.CASCADE, related_name="readme")
+    source_url = models.URLField(max_length=500, blank=True)
+    html = models.TextField(blank=True)
+    etag = models.CharField(max_length=255, blank=True)
+    last_modified = models.CharField(max_length=64, blank=True)
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    fetched_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['fetched_at']),
+        ]
+
+    def __str__(self):
+        return f"README for {self.project.title}"
@@ -0,0 +1,149 @@
+"""
+GitHub README cache for project pages.
+
+READMEs are fetched outside the request cycle and stored, already rendered
+and sanitized, in ProjectReadme. ``project_detail`` only reads that row and
+asks for a background refresh when it is missing or stale; the
+``refresh_project_readmes`` management command refreshes everything from
+cron. Fetches share one pooled ``requests.Session``, always use a timeout
+and send the stored ETag/Last-Modified so unchanged READMEs cost a 304.
+A fetch that gets no response leaves the row stale; page views retry it
+after ERROR_BACKOFF, the command on its next run.
+"""
+
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections
+from django.utils import timezone
+
+from courses.rendering import render_markdown
+
+from .models import Project, ProjectReadme
+
+logger = logging.getLogger(__name__)
+
+RAW_README_URL = 'https://raw.githubusercontent.com/{owner}/{repo}/main/README.md'
+
+# (connect, read) timeouts in seconds
+FETCH_TIMEOUT = getattr(settings, 'PROJECT_README_TIMEOUT', (3.05, 10))
+MAX_AGE = timedelta(seconds=getattr(settings, 'PROJECT_README_MAX_AGE', 60 * 60 * 6))
+WORKERS = getattr(settings, 'PROJECT_README_WORKERS', 2)
+
+# Don't queue the same project twice while a refresh is in flight
+REFRESH_LOCK_TIMEOUT = 60
+# Wait this long (seconds) before a page view retries a failed fetch
+ERROR_BACKOFF = getattr(settings, 'PROJECT_README_ERROR_BACKOFF', 60 * 5)
+
+_session = None
+_session_lock = threading.Lock()
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_session():
+    """Shared HTTP session so connections to GitHub are pooled and reused"""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                retry = Retry(total=2, read=0, backoff_factor=0.5, status_forcelist=(502, 503, 504), allowed_methods=('GET',))
+                adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max(WORKERS, 4), max_retries=retry)
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                session.headers['User-Agent'] = 'nxgen-readme-fetcher'
+                _session = session
+    return _session
+
+
+def readme_url(github_link):
+    """Raw README URL for a GitHub repository link, or '' if it can't be parsed"""
+    if not github_link:
+        return ''
+    parts = [part for part in github_link.split('?')[0].rstrip('/').split('/') if part]
+    if len(parts) < 2:
+        return ''
+    owner, repo = parts[-2], parts[-1]
+    if repo.endswith('.git'):
+        repo = repo[:-4]
+    return RAW_README_URL.format(owner=owner, repo=repo)
+
+
+def is_stale(readme):
+    return readme is None or readme.fetched_at is None or timezone.now() - readme.fetched_at > MAX_AGE
+
+
+def refresh_readme(project):
+    """Fetch ``project``'s README if it changed and store it. Returns the ProjectReadme."""
+    readme, _ = ProjectReadme.objects.get_or_create(project=project)
+    url = readme_url(project.github_link)
+    if url != readme.source_url:
+        # Repository link changed, the cached copy belongs to another README
+        readme.source_url = url
+        readme.html = readme.etag = readme.last_modified = ''
+
+    if url:
+        headers = {}
+        if readme.etag:
+            headers['If-None-Match'] = readme.etag
+        if readme.last_modified:
+            headers['If-Modified-Since'] = readme.last_modified
+        try:
+            response = get_session().get(url, headers=headers, timeout=FETCH_TIMEOUT)
+        except requests.RequestException as e:
+            # Keep serving the old copy. fetched_at is left alone so the row
+            # stays stale and the next refresh tries again
+            logger.warning(f"Error fetching README for project {project.pk}: {e}")
+            readme.status_code = None
+            readme.save()
+            return readme
+        readme.status_code = response.status_code
+        if response.status_code == 200:
+            readme.html = render_markdown(response.text)
+            readme.etag = response.headers.get('ETag', '')
+            readme.last_modified = response.headers.get('Last-Modified', '')
+        elif response.status_code == 404:
+            readme.html = readme.etag = readme.last_modified = ''
+
+    readme.fetched_at = timezone.now()
+    readme.save()
+    return readme
+
+
+def _refresh_in_background(project_id):
+    close_old_connections()
+    lock_key = f'projects:readme:refreshing:{project_id}'
+    try:
+        project = Project.objects.filter(pk=project_id).first()
+        if project is not None and is_stale(refresh_readme(project)):
+            # The fetch failed; hold the lock a little longer so page views
+            # don't retry against an unreachable upstream on every request
+            cache.set(lock_key, 1, ERROR_BACKOFF)
+            return
+    except Exception:
+        logger.exception(f"README refresh failed for project {project_id}")
+    finally:
+        close_old_connections()
+    cache.delete(lock_key)
+
+
+def schedule_refresh(project_id):
+    """Queue a background refresh of a project's README, returns False if one is already queued"""
+    global _executor
+    if not cache.add(f'projects:readme:refreshing:{project_id}', 1, REFRESH_LOCK_TIMEOUT):
+        return False
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=WORKERS, thread_name_prefix='readme-fetcher')
+    _executor.submit(_refresh_in_background, project_id)
+    return True
@@ -0,0 +1,56 @@
+from django.core.cache import cache
+from django.db.models import F
+from django.db.models.signals import post_init, post_save, post_delete
+from django.dispatch import receiver
+
+from nxgen.pagecache import invalidate_tags
+
+from .models import Comment, Like, Project, TAG_COUNTS_CACHE_KEY, trending_weight
+
+
+@receiver(post_init, sender=Project)
+def remember_tech_stack(sender, instance, **kwargs):
+    """Keep tech_stack as loaded so the technology links are only rebuilt when it changes"""
+    instance._saved_tech_stack = instance.tech_stack if instance.pk else None
+
+
+@receiver(post_save, sender=Project)
+def sync_technologies_on_save(sender, instance, created, raw=False, **kwargs):
+    if raw or (not created and instance.tech_stack == instance._saved_tech_stack):
+        return
+    instance.sync_technologies()
+    instance._saved_tech_stack = instance.tech_stack
+
+
+@receiver(post_delete, sender=Project)
+def invalidate_tag_counts(sender, **kwargs):
+    cache.delete(TAG_COUNTS_CACHE_KEY)
+
+
+@receiver(post_save, sender=Like)
+def count_like(sender, instance, created, raw=False, **kwargs):
+    if not created or raw:
+        return
+    Project.objects.filter(pk=instance.project_id).update(
+        like_count=F('like_count') + 1,
+        trending_score=F('trending_score') + trending_weight(instance.created_at),
+    )
+
+
+@receiver(post_delete, sender=Like)
+def uncount_like(sender, instance, **kwargs):
+    Project.objects.filter(pk=instance.project_id, like_count__gt=0).update(
+        like_count=F('like_count') - 1,
+        trending_score=F('trending_score') - trending_weight(instance.created_at),
+    )
+
+
+@receiver(post_save, sender=Project)
+@receiver(post_delete, sender=Project)
+@receiver(post_save, sender=Like)
+@receiver(post_delete, sender=Like)
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_project_pages(sender, **kwargs):
+    """Drop the cached project gallery"""
+    invalidate_tags('projects')
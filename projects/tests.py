@@ -1,3 +1,158 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+import requests
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
 from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from . import readme
+from .models import Project, ProjectReadme
+
+README = '# Stub project\n\nBuilt for **tests**.'
+ETAG = '"v1"'
+
+
+class StubGitHubHandler(BaseHTTPRequestHandler):
+    """Serves README for every path and answers 304 to a matching If-None-Match"""
+
+    def do_GET(self):
+        self.server.requests.append((self.path, dict(self.headers)))
+        if self.headers.get('If-None-Match') == ETAG:
+            self.send_response(304)
+            self.end_headers()
+            return
+        body = README.encode()
+        self.send_response(200)
+        self.send_header('ETag', ETAG)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class ReadmeFetchTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), StubGitHubHandler)
+        cls.server.requests = []
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.stub_url = f'http://127.0.0.1:{cls.server.server_port}/{{owner}}/{{repo}}/README.md'
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        self.server.requests.clear()
+        cache.clear()
+        patcher = mock.patch.object(readme, 'RAW_README_URL', self.stub_url)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        user = User.objects.create_user('maker')
+        self.project = Project.objects.create(
+            title='Stub', description='A project', tech_stack='Python',
+            created_by=user, github_link='https://github.com/nxgen/stub',
+        )
+
+    def test_fetch_and_revalidate(self):
+        fetched = readme.refresh_readme(self.project)
+        self.assertEqual(fetched.status_code, 200)
+        self.assertEqual(fetched.etag, ETAG)
+        self.assertIn('<strong>tests</strong>', fetched.html)
+        self.assertIsNotNone(fetched.fetched_at)
+        self.assertEqual(self.server.requests[0][0], '/nxgen/stub/README.md')
+
+        # The second fetch is conditional and keeps the stored copy on a 304
+        revalidated = readme.refresh_readme(self.project)
+        self.assertEqual(self.server.requests[1][1].get('If-None-Match'), ETAG)
+        self.assertEqual(revalidated.status_code, 304)
+        self.assertEqual(revalidated.html, fetched.html)
+        self.assertGreater(revalidated.fetched_at, fetched.fetched_at)
+
+    def test_unreachable_upstream_stays_stale(self):
+        fetched = readme.refresh_readme(self.project)
+
+        down = mock.patch.object(readme.get_session(), 'get', side_effect=requests.ConnectionError('down'))
+        with down, self.assertLogs('projects.readme', 'WARNING'):
+            failed = readme.refresh_readme(self.project)
+        self.assertIsNone(failed.status_code)
+        self.assertEqual(failed.fetched_at, fetched.fetched_at)
+        self.assertEqual(failed.html, fetched.html)
+
+        # After a failed background refresh page views back off instead of
+        # retrying on every request
+        ProjectReadme.objects.filter(pk=failed.pk).update(fetched_at=None)
+        cache.add(f'projects:readme:refreshing:{self.project.pk}', 1)
+        with down, self.assertLogs('projects.readme', 'WARNING'), \
+                mock.patch.object(readme, 'close_old_connections'):
+            readme._refresh_in_background(self.project.pk)
+        self.assertFalse(readme.schedule_refresh(self.project.pk))
+
+    def test_detail_page_reads_the_cache_only(self):
+        readme.refresh_readme(self.project)
+        self.server.requests.clear()
+
+        response = self.client.get(reverse('projects:project_detail', kwargs={'project_id': self.project.pk}))
+        self.assertContains(response, '<strong>tests</strong>', html=True)
+        self.assertEqual(self.server.requests, [])
+
+
+class ProjectGalleryTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        user = User.objects.create_user('maker')
+        for i in range(30):
+            Project.objects.create(title=f'Project {i}', description='A project', tech_stack='Python', created_by=user)
+        # Ties on created_at must be broken by id
+        Project.objects.update(created_at=timezone.now())
+
+    def walk(self, direction, cursor_name):
+        """Follow the cursors in one direction from the first page, returns the pages"""
+        url = reverse('projects:project_home')
+        response = self.client.get(url)
+        pages = [[project.pk for project in response.context['projects']]]
+        while response.context[cursor_name]:
+            response = self.client.get(url, {direction: response.context[cursor_name]})
+            pages.append([project.pk for project in response.context['projects']])
+        return pages, response.context
+
+    def test_pages_cover_every_project_once(self):
+        expected = list(Project.objects.order_by('-created_at', '-id').values_list('pk', flat=True))
+        pages, last = self.walk('after', 'next_cursor')
+        self.assertEqual(len(pages), 3)
+        self.assertEqual(sum(pages, []), expected)
+
+        # Back from the last page, the same pages in reverse
+        url = reverse('projects:project_home')
+        back = []
+        cursor = last['previous_cursor']
+        while cursor:
+            context = self.client.get(url, {'before': cursor}).context
+            back.append([project.pk for project in context['projects']])
+            cursor = context['previous_cursor']
+        self.assertEqual(back, pages[-2::-1])
+
+
+class TechnologyTests(TestCase):
+    def test_tech_stack_is_comma_separated(self):
+        user = User.objects.create_user('maker')
+        project = Project.objects.create(
+            title='Stack', description='A project', tech_stack='Python, Django ,, JavaScript', created_by=user,
+        )
+        self.assertEqual(project.tech_tags, ['Python', 'Django', 'JavaScript'])
+        self.assertEqual(
+            sorted(project.technologies.values_list('name', flat=True)), ['Django', 'JavaScript', 'Python'],
+        )
 
-# Create your tests here.
+        self.client.force_login(user)
+        self.assertContains(self.client.get(reverse('projects:add_project')), 'Separate technologies with commas')
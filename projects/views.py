@@ -1,53 +1,82 @@
+from urllib.parse import urlencode
+
+from django.http import JsonResponse
 from django.shortcuts import render, get_object_or_404, redirect
+from django.views.decorators.http import require_POST
 from django.contrib.auth.decorators import login_required
-from .models import Project, Like
+from nxgen.keyset import decode_cursor, encode_cursor, seek_after, seek_before
+from nxgen.pagecache import cache_page_by_tags
+from .models import Project, Like, Technology
 from .forms import ProjectForm, CommentForm
-import requests
-import markdown
+from .readme import is_stale, schedule_refresh
 from django.utils.safestring import mark_safe
 # Create your views here.
 
-def project_home(request):
-    projects = Project.objects.all().order_by('-created_at')
-    return render(request, 'projects/project_home.html', {'projects': projects})
+PROJECTS_PER_PAGE = 12
 
-# Fetch README
-def fetch_github_readme(github_link):
-    if not github_link:
-        return None
-    
-    try:
-        # Extract username and repo name
-        parts = github_link.rstrip('/').split('/')
-        username, repo = parts[-2], parts[-1]
 
-        # GitHub API URL to fetch README
-        api_url = f"https://raw.githubusercontent.com/{username}/{repo}/main/README.md"
+@cache_page_by_tags('projects')
+def project_home(request):
+    """
+    Project gallery. Pages are addressed by keyset cursors (``after``/``before``)
+    rather than offsets, so deep pages cost the same as the first one.
+    """
+    projects = Project.objects.gallery()
 
-        response = requests.get(api_url)
-        if response.status_code == 200:
-            readme_html = markdown.markdown(response.text)
-            return mark_safe(readme_html)  
-    except Exception as e:
-        print("Error fetching README:", e)
+    filters = {}
+    if request.GET.get('seeking') == '1':
+        projects = projects.filter(is_seeking_collaborators=True)
+        filters['seeking'] = '1'
+    tech = request.GET.get('tech', '').strip()
+    if tech:
+        projects = projects.using_technology(tech)
+        filters['tech'] = tech
 
-    return None 
+    after = decode_cursor(request.GET.get('after'))
+    before = decode_cursor(request.GET.get('before'))
+    if before:
+        page = list(seek_before(projects.order_by('created_at', 'id'), before)[:PROJECTS_PER_PAGE + 1])
+        has_previous = len(page) > PROJECTS_PER_PAGE
+        page = page[:PROJECTS_PER_PAGE][::-1]
+        has_next = True
+    else:
+        if after:
+            projects = seek_after(projects, after)
+        page = list(projects[:PROJECTS_PER_PAGE + 1])
+        has_next = len(page) > PROJECTS_PER_PAGE
+        page = page[:PROJECTS_PER_PAGE]
+        has_previous = bool(after)
 
+    context = {
+        'projects': page,
+        'filters': filters,
+        'tag_counts': Technology.tag_counts(),
+        'trending': Project.objects.trending()[:4] if not (filters or after or before) else [],
+        'filter_query': urlencode(filters),
+        'next_cursor': encode_cursor(page[-1]) if page and has_next else None,
+        'previous_cursor': encode_cursor(page[0]) if page and has_previous else None,
+    }
+    return render(request, 'projects/project_home.html', context)
 
 # Show project details
 def project_detail(request, project_id):
-    project = get_object_or_404(Project, id=project_id)
+    project = get_object_or_404(Project.objects.select_related('readme'), id=project_id)
     comments = project.comments.all()
     form = CommentForm()
 
-    # Fetch README from GitHub
-    readme_content = fetch_github_readme(project.github_link)
+    # README comes from the cache only, GitHub is never hit during the request
+    readme = getattr(project, 'readme', None)
+    if project.github_link and is_stale(readme):
+        schedule_refresh(project.pk)
+    readme_content = mark_safe(readme.html) if readme and readme.html else None
+    user_liked = request.user.is_authenticated and Like.objects.filter(project=project, user=request.user).exists()
 
     return render(request, 'projects/project_detail.html', {
         'project': project,
         'comments': comments,
         'form': form,
-        'readme_content': readme_content
+        'readme_content': readme_content,
+        'user_liked': user_liked,
     })
 
 
@@ -60,6 +89,8 @@ def add_project(request):
             project = form.save(commit=False)
             project.created_by = request.user
             project.save()
+            if project.github_link:
+                schedule_refresh(project.pk)
             return redirect('projects:project_home')
     else:
         form = ProjectForm()
@@ -80,9 +111,10 @@ def add_comment(request, project_id):
 
 # Like a project
 @login_required
+@require_POST
 def like_project(request, project_id):
     project = get_object_or_404(Project, id=project_id)
-    like, created = Like.objects.get_or_create(project=project, user=request.user)
-    if not created:
-        like.delete()  # Toggle like
-    return redirect('projects:project_detail', project_id=project.id)
\ No newline at end of file
+    liked, like_count = project.toggle_like(request.user)
+    if request.headers.get('x-requested-with') == 'XMLHttpRequest' or 'application/json' in request.headers.get('accept', ''):
+        return JsonResponse({'liked': liked, 'like_count': like_count})
+    return redirect('projects:project_detail', project_id=project.id)
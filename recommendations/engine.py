@@ -0,0 +1,252 @@
+"""
+Precomputed "related courses" and "similar events".
+
+For every course and event the top candidates are scored once, from shared
+categories, how many people enrolled in / registered for both, and recency,
+and the best ``TOP_N`` are stored in CourseRecommendation /
+EventRecommendation. Detail pages then read them with one indexed lookup.
+The lists are refreshed by recommendations.signals when an item, its
+enrollments or its registrations change, the neighbours' lists in the
+background (see recommendations.tasks); ``rebuild_recommendations``
+recomputes everything.
+"""
+
+import math
+
+from django.db import transaction
+from django.db.models import Count, IntegerField, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from courses.models import Course, CourseEnrollment
+from events.models import Event, Registration
+
+from .models import CourseRecommendation, EventRecommendation
+
+TOP_N = 10
+
+# Candidates considered per item, on top of the co-enrolled/co-registered ones
+CANDIDATE_LIMIT = 200
+
+CATEGORY_WEIGHT = 1.0
+OVERLAP_WEIGHT = 2.0
+RECENCY_WEIGHT = 0.5
+RECENCY_HALF_LIFE_DAYS = 30
+
+# A change also moves the lists of neighbouring courses/events; only this
+# many of them are refreshed on the spot, the rebuild command does the rest
+NEIGHBOUR_REFRESH_LIMIT = 20
+
+
+def _overlap(shared, size_a, size_b):
+    """Cosine overlap of two audiences"""
+    if not shared or not size_a or not size_b:
+        return 0.0
+    return shared / math.sqrt(size_a * size_b)
+
+
+def _decay(days):
+    return 0.5 ** (max(days, 0) / RECENCY_HALF_LIFE_DAYS)
+
+
+def _store(model, source_id, scored):
+    top = sorted(scored, key=lambda item: (-item[1], -item[0]))[:TOP_N]
+    with transaction.atomic():
+        model.objects.filter(source_id=source_id).delete()
+        model.objects.bulk_create([
+            model(source_id=source_id, target_id=target_id, rank=rank, score=score)
+            for rank, (target_id, score) in enumerate(top)
+        ])
+    return len(top)
+
+
+def refresh_course(course_id):
+    """Recompute the related courses of one course"""
+    course = Course.objects.filter(pk=course_id).values('pk', 'category_id', 'status').first()
+    if course is None:
+        return 0
+    if course['status'] != 'published':
+        CourseRecommendation.objects.filter(source_id=course_id).delete()
+        return 0
+
+    audience = CourseEnrollment.objects.filter(course_id=course_id).values('user')
+    co_enrolled = dict(
+        CourseEnrollment.objects.filter(user__in=audience)
+        .exclude(course_id=course_id)
+        .values('course')
+        .annotate(n=Count('pk'))
+        .values_list('course', 'n')
+    )
+    audience_size = CourseEnrollment.objects.filter(course_id=course_id).count()
+
+    candidates = (
+        Course.objects.filter(status='published')
+        .filter(Q(pk__in=list(co_enrolled)) | Q(category_id=course['category_id']))
+        .exclude(pk=course_id)
+        .annotate(num_enrolled=Count('enrollments'))
+        .order_by('-created_at')
+        .values('pk', 'category_id', 'created_at', 'published_at', 'num_enrolled')[:CANDIDATE_LIMIT + len(co_enrolled)]
+    )
+
+    now = timezone.now()
+    scored = []
+    for candidate in candidates:
+        published = candidate['published_at'] or candidate['created_at']
+        score = (
+            CATEGORY_WEIGHT * (candidate['category_id'] == course['category_id'])
+            + OVERLAP_WEIGHT * _overlap(co_enrolled.get(candidate['pk'], 0), audience_size, candidate['num_enrolled'])
+            + RECENCY_WEIGHT * _decay((now - published).days)
+        )
+        scored.append((candidate['pk'], score))
+    return _store(CourseRecommendation, course_id, scored)
+
+
+def refresh_event(event_id):
+    """Recompute the similar events of one event"""
+    event = Event.objects.filter(pk=event_id).values('pk', 'status').first()
+    if event is None:
+        return 0
+    if event['status'] != 'published':
+        EventRecommendation.objects.filter(source_id=event_id).delete()
+        return 0
+
+    categories = list(Event.categories.through.objects.filter(event_id=event_id).values_list('eventcategory_id', flat=True))
+    attendees = Registration.objects.filter(event_id=event_id).exclude(status=Registration.CANCELED)
+    co_registered = dict(
+        Registration.objects.filter(attendee__in=attendees.values('attendee'))
+        .exclude(status=Registration.CANCELED)
+        .exclude(event_id=event_id)
+        .values('event')
+        .annotate(n=Count('pk'))
+        .values_list('event', 'n')
+    )
+    audience_size = attendees.count()
+
+    # Counted in a subquery: the category filter below narrows the join that
+    # an annotation over 'categories' would reuse
+    category_count = (
+        Event.categories.through.objects.filter(event=OuterRef('pk'))
+        .values('event')
+        .annotate(n=Count('pk'))
+        .values('n')
+    )
+
+    now = timezone.now()
+    candidates = (
+        Event.objects.filter(status='published', end_date__gte=now)
+        .filter(Q(pk__in=list(co_registered)) | Q(categories__in=categories))
+        .exclude(pk=event_id)
+        .annotate(
+            shared=Count('categories', filter=Q(categories__in=categories), distinct=True),
+            num_categories=Coalesce(Subquery(category_count, output_field=IntegerField()), 0),
+            num_registered=Count('registrations', filter=~Q(registrations__status=Registration.CANCELED), distinct=True),
+        )
+        .order_by('start_date')
+        .values('pk', 'start_date', 'shared', 'num_categories', 'num_registered')[:CANDIDATE_LIMIT + len(co_registered)]
+    )
+
+    scored = []
+    for candidate in candidates:
+        union = len(categories) + candidate['num_categories'] - candidate['shared']
+        score = (
+            CATEGORY_WEIGHT * (candidate['shared'] / union if union else 0)
+            + OVERLAP_WEIGHT * _overlap(co_registered.get(candidate['pk'], 0), audience_size, candidate['num_registered'])
+            # Sooner events first
+            + RECENCY_WEIGHT * _decay((candidate['start_date'] - now).days)
+        )
+        scored.append((candidate['pk'], score))
+    return _store(EventRecommendation, event_id, scored)
+
+
+def refresh_enrolled_courses(user_id, course_id):
+    """An enrollment in ``course_id`` changes the lists of the user's other courses"""
+    others = (
+        CourseEnrollment.objects.filter(user_id=user_id)
+        .exclude(course_id=course_id)
+        .order_by('-enrolled_at')
+        .values_list('course_id', flat=True)[:NEIGHBOUR_REFRESH_LIMIT]
+    )
+    for other_id in others:
+        refresh_course(other_id)
+
+
+def refresh_registered_events(user_id, event_id):
+    """A registration for ``event_id`` changes the lists of the user's other upcoming events"""
+    others = (
+        Registration.objects.filter(attendee_id=user_id, event__end_date__gte=timezone.now())
+        .exclude(event_id=event_id)
+        .order_by('-registration_date')
+        .values_list('event_id', flat=True)[:NEIGHBOUR_REFRESH_LIMIT]
+    )
+    for other_id in others:
+        refresh_event(other_id)
+
+
+def refresh_course_neighbours(course_id):
+    """
+    A course that was just published or moved to another category belongs in
+    the lists of the courses of its category too, refreshed for the
+    NEIGHBOUR_REFRESH_LIMIT most recent ones.
+    """
+    category_id = Course.objects.filter(pk=course_id).values_list('category_id', flat=True).first()
+    neighbours = (
+        Course.objects.filter(status='published', category_id=category_id)
+        .exclude(pk=course_id)
+        .order_by('-created_at')
+        .values_list('pk', flat=True)[:NEIGHBOUR_REFRESH_LIMIT]
+    )
+    for neighbour_id in neighbours:
+        refresh_course(neighbour_id)
+
+
+def refresh_event_neighbours(event_id):
+    """
+    An event that was just published or given new categories belongs in the
+    lists of the upcoming events of those categories too, refreshed for the
+    NEIGHBOUR_REFRESH_LIMIT soonest ones.
+    """
+    categories = Event.categories.through.objects.filter(event_id=event_id).values('eventcategory_id')
+    neighbours = (
+        Event.objects.filter(status='published', end_date__gte=timezone.now(), categories__in=categories)
+        .exclude(pk=event_id)
+        .order_by('start_date')
+        .values_list('pk', flat=True)
+        .distinct()[:NEIGHBOUR_REFRESH_LIMIT]
+    )
+    for neighbour_id in neighbours:
+        refresh_event(neighbour_id)
+
+
+def rebuild(stdout=None):
+    courses = 0
+    for course_id in Course.objects.filter(status='published').values_list('pk', flat=True).iterator():
+        refresh_course(course_id)
+        courses += 1
+    events = 0
+    for event_id in Event.objects.filter(status='published').values_list('pk', flat=True).iterator():
+        refresh_event(event_id)
+        events += 1
+    if stdout:
+        stdout.write(f"courses: {courses}, events: {events}")
+
+
+def related_courses(course, limit=3):
+    """Precomputed related courses, in one query"""
+    recommendations = (
+        CourseRecommendation.objects.filter(source=course, target__status='published')
+        .select_related('target__author')
+        .order_by('rank')[:limit]
+    )
+    return [recommendation.target for recommendation in recommendations]
+
+
+def similar_events(event, limit=3):
+    """Precomputed similar events that haven't ended yet, in one query"""
+    recommendations = (
+        EventRecommendation.objects.filter(
+            source=event, target__status='published', target__end_date__gte=timezone.now(),
+        )
+        .select_related('target')
+        .order_by('rank')[:limit]
+    )
+    return [recommendation.target for recommendation in recommendations]
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from recommendations.engine import rebuild
+
+
+class Command(BaseCommand):
+    help = 'Recompute the related courses and similar events of every published course and event'
+
+    def handle(self, *args, **options):
+        rebuild(stdout=self.stdout)
+        self.stdout.write(self.style.SUCCESS('Recommendations rebuilt'))
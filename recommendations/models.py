@@ -0,0 +1,38 @@
+from django.db import models
+
+from courses.models import Course
+from events.models import Event
+
+
+class CourseRecommendation(models.Model):
+    """One precomputed "related course" entry, written by recommendations.engine"""
+    source = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='recommendations')
+    target = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='+')
+    rank = models.PositiveSmallIntegerField()
+    score = models.FloatField()
+
+    class Meta:
+        ordering = ['source', 'rank']
+        indexes = [
+            models.Index(fields=['source', 'rank']),
+        ]
+
+    def __str__(self):
+        return f"{self.source_id} -> {self.target_id} (#{self.rank})"
+
+
+class EventRecommendation(models.Model):
+    """One precomputed "similar event" entry, written by recommendations.engine"""
+    source = models.ForeignKey(Event, on_delete=models.CASCADE, related_name='recommendations')
+    target = models.ForeignKey(Event, on_delete=models.CASCADE, related_name='+')
+    rank = models.PositiveSmallIntegerField()
+    score = models.FloatField()
+
+    class Meta:
+        ordering = ['source', 'rank']
+        indexes = [
+            models.Index(fields=['source', 'rank']),
+        ]
+
+    def __str__(self):
+        return f"{self.source_id} -> {self.target_id} (#{self.rank})"
@@ -0,0 +1,94 @@
+from functools import wraps
+
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from courses.models import Course, CourseEnrollment
+from events.models import Event, Registration
+
+from . import engine, tasks
+
+
+def _after_commit(func, *args):
+    """
+    Run a refresh once the transaction commits. The lists are derived data,
+    so a failing refresh is logged instead of failing the request that
+    already committed the change.
+    """
+    @wraps(func)
+    def refresh():
+        tasks.run(func, *args)
+    transaction.on_commit(refresh)
+
+
+def _queue_after_commit(func, *args):
+    """Hand a refresh of neighbouring lists to the background worker once the transaction commits"""
+    @wraps(func)
+    def queue():
+        tasks.schedule(func, *args)
+    # A named callable, robust mode logs a failure to queue under func's name
+    transaction.on_commit(queue, robust=True)
+
+
+def _listed(instance, *fields):
+    # Read from __dict__ so instances loaded with only() don't fetch the fields
+    return tuple(instance.__dict__.get(field) for field in fields)
+
+
+@receiver(post_init, sender=Course)
+def remember_course_listing(sender, instance, **kwargs):
+    instance._saved_listing = _listed(instance, 'status', 'category_id') if instance.pk else None
+
+
+@receiver(post_save, sender=Course)
+def refresh_course_recommendations(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    _after_commit(engine.refresh_course, instance.pk)
+    listing = _listed(instance, 'status', 'category_id')
+    if listing[0] == 'published' and listing != instance._saved_listing:
+        # Newly published or recategorized: enter the other courses' lists
+        _queue_after_commit(engine.refresh_course_neighbours, instance.pk)
+    instance._saved_listing = listing
+
+
+@receiver(post_save, sender=CourseEnrollment)
+@receiver(post_delete, sender=CourseEnrollment)
+def refresh_on_enrollment(sender, instance, raw=False, **kwargs):
+    if not raw:
+        _after_commit(engine.refresh_course, instance.course_id)
+        _queue_after_commit(engine.refresh_enrolled_courses, instance.user_id, instance.course_id)
+
+
+@receiver(post_init, sender=Event)
+def remember_event_status(sender, instance, **kwargs):
+    instance._saved_listing = _listed(instance, 'status') if instance.pk else None
+
+
+@receiver(post_save, sender=Event)
+def refresh_event_recommendations(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    _after_commit(engine.refresh_event, instance.pk)
+    listing = _listed(instance, 'status')
+    if listing[0] == 'published' and listing != instance._saved_listing:
+        # Newly published: enter the lists of the events it shares categories with
+        _queue_after_commit(engine.refresh_event_neighbours, instance.pk)
+    instance._saved_listing = listing
+
+
+@receiver(m2m_changed, sender=Event.categories.through)
+def refresh_on_event_categories(sender, instance, action, reverse, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear') and not reverse:
+        _after_commit(engine.refresh_event, instance.pk)
+        if action == 'post_add' and instance.status == 'published':
+            _queue_after_commit(engine.refresh_event_neighbours, instance.pk)
+
+
+@receiver(post_save, sender=Registration)
+@receiver(post_delete, sender=Registration)
+def refresh_on_registration(sender, instance, raw=False, **kwargs):
+    if not raw:
+        _after_commit(engine.refresh_event, instance.event_id)
+        _queue_after_commit(engine.refresh_registered_events, instance.attendee_id, instance.event_id)
@@ -0,0 +1,67 @@
+"""
+Recommendation refreshes outside the request.
+
+A change refreshes the list of the item it touches right after commit. The
+lists of its neighbours (the user's other courses or events, the courses of
+a category a course was just published in), at most
+``NEIGHBOUR_REFRESH_LIMIT`` of them, are handed to a single background
+worker: requests don't wait for them, and one worker never competes with
+itself for SQLite's single writer. ``rebuild_recommendations`` catches up
+whatever is beyond the limit. A refresh that finds the database locked is
+retried a few times before it is logged and dropped.
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import OperationalError, close_old_connections
+
+logger = logging.getLogger(__name__)
+
+# 0 runs neighbour refreshes inline after commit instead (tests)
+WORKERS = getattr(settings, 'RECOMMENDATION_WORKERS', 1)
+
+RETRIES = 5
+RETRY_DELAY = 0.1  # seconds, doubles with each attempt
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def run(func, *args):
+    """Call ``func(*args)``, retrying while the database is locked. Failures are logged, not raised."""
+    for attempt in range(RETRIES + 1):
+        try:
+            return func(*args)
+        except OperationalError as e:
+            if attempt == RETRIES:
+                logger.error(f"{func.__name__}{args} failed after {RETRIES} retries: {e}")
+                return None
+            time.sleep(RETRY_DELAY * 2 ** attempt)
+        except Exception:
+            logger.exception(f"{func.__name__}{args} failed")
+            return None
+
+
+def _run_in_background(func, *args):
+    close_old_connections()
+    try:
+        run(func, *args)
+    finally:
+        close_old_connections()
+
+
+def schedule(func, *args):
+    """Queue ``func(*args)`` for the background worker"""
+    global _executor
+    if not WORKERS:
+        run(func, *args)
+        return
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=WORKERS, thread_name_prefix='recommendations')
+    _executor.submit(_run_in_background, func, *args)
@@ -0,0 +1,61 @@
+import threading
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.db import OperationalError
+from django.test import TestCase
+
+from courses.models import Category, Course, CourseEnrollment
+
+from . import engine, tasks
+from .models import CourseRecommendation
+
+
+class RefreshTests(TestCase):
+    def setUp(self):
+        author = User.objects.create_user('author')
+        category = Category.objects.create(name='Category')
+        self.courses = [
+            Course.objects.create(
+                title=f'Course {i}', author=author, category=category,
+                description='About', content='# Content', status='published',
+            )
+            for i in range(engine.NEIGHBOUR_REFRESH_LIMIT + 10)
+        ]
+        self.student = User.objects.create_user('student')
+        for course in self.courses[1:]:
+            CourseEnrollment.objects.create(course=course, user=self.student)
+
+    def test_enrollment_refreshes_a_bounded_number_of_lists(self):
+        with mock.patch.object(engine, 'refresh_course', wraps=engine.refresh_course) as refresh, \
+                self.captureOnCommitCallbacks(execute=True):
+            CourseEnrollment.objects.create(course=self.courses[0], user=self.student)
+        # The course itself, then its neighbours up to the limit
+        self.assertEqual(refresh.call_count, 1 + engine.NEIGHBOUR_REFRESH_LIMIT)
+        self.assertEqual(refresh.call_args_list[0], mock.call(self.courses[0].pk))
+        self.assertTrue(CourseRecommendation.objects.filter(source=self.courses[0]).exists())
+
+    def test_locked_database_is_retried_then_logged(self):
+        locked = mock.Mock(side_effect=OperationalError('database table is locked'), __name__='refresh_course')
+        with mock.patch.object(tasks, 'RETRY_DELAY', 0), self.assertLogs('recommendations.tasks', 'ERROR'):
+            self.assertIsNone(tasks.run(locked, 1))
+        self.assertEqual(locked.call_count, tasks.RETRIES + 1)
+
+        flaky = mock.Mock(side_effect=[OperationalError('database table is locked'), 3], __name__='refresh_course')
+        with mock.patch.object(tasks, 'RETRY_DELAY', 0):
+            self.assertEqual(tasks.run(flaky, 1), 3)
+
+    def test_schedule_uses_the_background_worker(self):
+        done = threading.Event()
+        threads = []
+
+        def refresh(course_id):
+            threads.append(threading.current_thread().name)
+            done.set()
+
+        with mock.patch.object(tasks, 'WORKERS', 1), mock.patch.object(tasks, '_executor', None), \
+                mock.patch.object(tasks, 'close_old_connections'):
+            tasks.schedule(refresh, 1)
+            self.assertTrue(done.wait(5))
+            tasks._executor.shutdown()
+        self.assertTrue(threads[0].startswith('recommendations'))
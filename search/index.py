@@ -0,0 +1,314 @@
+"""
+Site-wide inverted index.
+
+Every searchable object is stored as a SearchDocument plus one SearchPosting
+per distinct term. Queries look up the postings for the query terms, keep
+the documents that contain all of them and rank them by a tf-idf score,
+so the cost of a search depends on the number of matching postings rather
+than on the size of the course/event/project/forum tables. Queries whose
+terms are all very common are cut off at ``MAX_CANDIDATES`` documents, the
+ones where the rarest query term weighs most.
+"""
+
+import math
+from collections import Counter
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Case, Count, F, FloatField, Sum, When
+from django.urls import reverse
+from django.utils.text import Truncator
+
+from .models import SearchDocument, SearchPosting
+from .tokenizer import term_weights, tokenize
+
+EXCERPT_LENGTH = 300
+DOCUMENT_COUNT_CACHE_KEY = 'search:document_count'
+DOCUMENT_COUNT_TIMEOUT = 60 * 5
+
+# Most documents a query ranks; past this the counts are lower bounds
+MAX_CANDIDATES = 2000
+
+
+# Document builders: return the title/body/url to index, or None when the
+# object should not be searchable (drafts, unpublished courses...)
+
+def course_document(course):
+    if course.status != 'published':
+        return None
+    return {
+        'title': course.title,
+        'body': f"{course.description}\n{course.content}",
+        'url': course.get_absolute_url(),
+    }
+
+
+def section_document(section):
+    course = section.course
+    if course.status != 'published':
+        return None
+    return {
+        'title': f"{course.title} - {section.title}",
+        'body': section.content,
+        'url': f"{course.get_absolute_url()}#heading{section.pk}",
+    }
+
+
+def event_document(event):
+    if event.status != 'published':
+        return None
+    return {
+        'title': event.title,
+        'body': f"{event.description}\n{event.location}",
+        'url': event.get_absolute_url(),
+    }
+
+
+def project_document(project):
+    return {
+        'title': project.title,
+        'body': f"{project.description}\n{project.tech_stack}",
+        'url': reverse('projects:project_detail', args=[project.pk]),
+    }
+
+
+def topic_document(topic):
+    return {
+        'title': topic.title,
+        'body': '',
+        'url': topic.get_absolute_url(),
+    }
+
+
+def post_document(post):
+    return {
+        'title': post.topic.title,
+        'body': post.content,
+        'url': f"{post.topic.get_absolute_url()}#post-{post.pk}",
+        # The topic is indexed on its own, don't let its title rank every reply
+        'title_boost': 0,
+    }
+
+
+# doc_type -> (model label, builder, select_related for bulk rebuilds)
+INDEXERS = {
+    'course': ('courses.Course', course_document, ()),
+    'section': ('courses.Section', section_document, ('course',)),
+    'event': ('events.Event', event_document, ()),
+    'project': ('projects.Project', project_document, ()),
+    'topic': ('forums.Topic', topic_document, ('category',)),
+    'post': ('forums.Post', post_document, ('topic__category',)),
+}
+
+
+def _excerpt(body):
+    return Truncator(' '.join(body.split())).chars(EXCERPT_LENGTH - 3)
+
+
+def _postings(document, weights):
+    return [SearchPosting(term=term, document=document, weight=weight) for term, weight in weights.items()]
+
+
+def index_object(doc_type, instance):
+    """Add or refresh ``instance`` in the index, or drop it if it is no longer searchable"""
+    builder = INDEXERS[doc_type][1]
+    data = builder(instance)
+    if data is None:
+        remove_object(doc_type, instance.pk)
+        return
+
+    weights = term_weights(data['title'], data['body'], data.get('title_boost', 3))
+    with transaction.atomic():
+        document, created = SearchDocument.objects.update_or_create(
+            doc_type=doc_type,
+            object_id=instance.pk,
+            defaults={
+                'title': data['title'][:255],
+                'excerpt': _excerpt(data['body']),
+                'url': data['url'],
+                'length': sum(weights.values()),
+            },
+        )
+        if not created:
+            document.postings.all().delete()
+        SearchPosting.objects.bulk_create(_postings(document, weights))
+    if created:
+        cache.delete(DOCUMENT_COUNT_CACHE_KEY)
+
+
+def remove_object(doc_type, object_id):
+    deleted, _ = SearchDocument.objects.filter(doc_type=doc_type, object_id=object_id).delete()
+    if deleted:
+        cache.delete(DOCUMENT_COUNT_CACHE_KEY)
+
+
+def rebuild(batch_size=500, stdout=None):
+    """Drop the whole index and rebuild it from every indexed model"""
+    from django.apps import apps
+
+    SearchDocument.objects.all().delete()
+    for doc_type, (label, builder, related) in INDEXERS.items():
+        queryset = apps.get_model(label).objects.select_related(*related)
+        indexed = 0
+        batch = []
+        for instance in queryset.iterator(chunk_size=batch_size):
+            data = builder(instance)
+            if data is None:
+                continue
+            weights = term_weights(data['title'], data['body'], data.get('title_boost', 3))
+            document = SearchDocument(
+                doc_type=doc_type,
+                object_id=instance.pk,
+                title=data['title'][:255],
+                excerpt=_excerpt(data['body']),
+                url=data['url'],
+                length=sum(weights.values()),
+            )
+            batch.append((document, weights))
+            if len(batch) >= batch_size:
+                indexed += _write_batch(batch)
+                batch = []
+        if batch:
+            indexed += _write_batch(batch)
+        if stdout:
+            stdout.write(f"{doc_type}: {indexed} documents")
+    cache.delete(DOCUMENT_COUNT_CACHE_KEY)
+
+
+def _write_batch(batch):
+    with transaction.atomic():
+        documents = SearchDocument.objects.bulk_create([document for document, _ in batch])
+        postings = []
+        for document, (_, weights) in zip(documents, batch):
+            postings.extend(_postings(document, weights))
+        SearchPosting.objects.bulk_create(postings, batch_size=2000)
+    return len(documents)
+
+
+def document_count():
+    count = cache.get(DOCUMENT_COUNT_CACHE_KEY)
+    if count is None:
+        count = SearchDocument.objects.count()
+        cache.set(DOCUMENT_COUNT_CACHE_KEY, count, DOCUMENT_COUNT_TIMEOUT)
+    return count
+
+
+def term_frequencies(terms):
+    """Term -> number of documents containing it, for the terms that occur at all"""
+    keys = {f'search:df:{term}': term for term in terms}
+    frequencies = {keys[key]: n for key, n in cache.get_many(keys).items()}
+    missing = [term for term in terms if term not in frequencies]
+    if missing:
+        counted = dict(
+            SearchPosting.objects.filter(term__in=missing)
+            .values('term')
+            .annotate(n=Count('pk'))
+            .values_list('term', 'n')
+        )
+        # Only idf depends on these, so they may lag behind the index a little
+        cache.set_many({f'search:df:{term}': n for term, n in counted.items()}, DOCUMENT_COUNT_TIMEOUT)
+        frequencies.update(counted)
+    return frequencies
+
+
+class SearchQuery:
+    """
+    A parsed query. ``facets`` gives the number of matches per document
+    type, and the object itself can be sliced/counted so it plugs straight
+    into a Paginator. The matches are scored in one query, at most
+    MAX_CANDIDATES of them, and facets, count and pages are all read from
+    that.
+    """
+
+    def __init__(self, query, doc_type=None):
+        self.query = query
+        self.doc_type = doc_type
+        self.terms = list(dict.fromkeys(tokenize(query)))
+        self._matches = None
+        self._facets = None
+        # Set when the query matched more than MAX_CANDIDATES documents
+        self.truncated = False
+
+    def _match_queryset(self):
+        """The matching documents with their type and score, None if nothing can match"""
+        if not self.terms:
+            return None
+        frequencies = term_frequencies(self.terms)
+        if len(frequencies) < len(self.terms):
+            # Every term has to match, and at least one matches nothing
+            return None
+
+        total = max(document_count(), 1)
+        idf = {
+            term: math.log(1 + (total - n + 0.5) / (n + 0.5))
+            for term, n in frequencies.items()
+        }
+        score = Sum(
+            Case(
+                *[When(term=term, then=F('weight') * idf[term]) for term in self.terms],
+                output_field=FloatField(),
+            )
+        )
+        postings = SearchPosting.objects.filter(term__in=self.terms)
+        rarest = min(self.terms, key=frequencies.get)
+        if frequencies[rarest] > MAX_CANDIDATES:
+            # Only rank the documents where the rarest term weighs most, instead
+            # of aggregating every posting of every term
+            candidates = (
+                SearchPosting.objects.filter(term=rarest)
+                .order_by('-weight', 'document')
+                .values('document')[:MAX_CANDIDATES]
+            )
+            postings = postings.filter(document__in=candidates)
+            self.truncated = True
+        return (
+            postings
+            .values('document', 'document__doc_type')
+            .annotate(matched=Count('term'), score=score)
+            .filter(matched=len(self.terms))
+        )
+
+    @property
+    def matches(self):
+        """(score, document id, doc_type) of every match, best first"""
+        if self._matches is None:
+            matches = self._match_queryset()
+            rows = matches.values_list('score', 'document', 'document__doc_type') if matches is not None else []
+            self._matches = sorted(rows, key=lambda row: (-row[0], row[1]))
+        return self._matches
+
+    @property
+    def facets(self):
+        """List of (doc_type, label, count) for every type with matches"""
+        if self._facets is None:
+            counts = Counter(doc_type for _, _, doc_type in self.matches)
+            self._facets = [
+                (doc_type, label, counts[doc_type])
+                for doc_type, label in SearchDocument.TYPE_CHOICES
+                if counts.get(doc_type)
+            ]
+        return self._facets
+
+    def _filtered(self):
+        if self.doc_type:
+            return [row for row in self.matches if row[2] == self.doc_type]
+        return self.matches
+
+    def count(self):
+        return len(self._filtered())
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+        rows = self._filtered()[index]
+        documents = SearchDocument.objects.in_bulk([document_id for _, document_id, _ in rows])
+        results = []
+        for score, document_id, _ in rows:
+            document = documents.get(document_id)
+            if document is not None:
+                document.score = score
+                results.append(document)
+        return results
@@ -0,0 +1,101 @@
+import itertools
+import random
+import time
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from search.index import DOCUMENT_COUNT_CACHE_KEY, SearchQuery, _write_batch
+from search.models import SearchDocument
+from search.tokenizer import term_weights
+
+WORDS = (
+    'django python template query index cache model view form migration '
+    'deploy server database sqlite postgres search ranking thread signal '
+    'hackathon course event project mentor team frontend backend api test'
+).split()
+
+SYLLABLES = 'ka lo mi nu pe ra si to vu xe ba do fi gu he'.split()
+
+QUERIES = ['django', 'sqlite index', 'hackathon team', 'migration', 'postgres ranking thread']
+
+TARGET_MS = 50
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed a throwaway search index and report the p50/p95 latency of the search page queries. '
+        'Everything is written in one transaction that is rolled back at the end.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--documents', type=int, default=100_000, help='Number of documents to seed')
+        parser.add_argument('--runs', type=int, default=20, help='Timed runs per query')
+
+    def handle(self, *args, **options):
+        rng = random.Random(0)
+        words = list(WORDS)
+        while len(words) < 5000:
+            words.append(''.join(rng.choices(SYLLABLES, k=rng.randint(2, 4))))
+        # Zipf-like: frequent words match most documents, the rarest only a handful
+        weights = list(itertools.accumulate(1 / rank for rank in range(1, len(words) + 1)))
+        queries = QUERIES + [words[-1], f'{words[100]} {words[-2]}']
+
+        with transaction.atomic():
+            started = time.perf_counter()
+            self.seed(rng, words, weights, options['documents'])
+            cache.delete(DOCUMENT_COUNT_CACHE_KEY)
+            self.stdout.write(f"Seeded {options['documents']} documents in {time.perf_counter() - started:.1f}s")
+
+            timings = []
+            for query in queries:
+                count, runs = self.time_query(query, options['runs'])
+                timings.extend(runs)
+                self.stdout.write(f'  {query!r}: {count} hits, {self.summary(runs)}')
+            p95 = self.percentile(timings, 95)
+            style = self.style.SUCCESS if p95 <= TARGET_MS else self.style.WARNING
+            self.stdout.write(style(f'All queries: {self.summary(timings)} (target p95 {TARGET_MS}ms)'))
+
+            transaction.set_rollback(True)
+        cache.delete(DOCUMENT_COUNT_CACHE_KEY)
+
+    def seed(self, rng, words, weights, documents, batch_size=1000):
+        """Bulk insert documents and postings, bypassing the model signals"""
+        doc_types = [doc_type for doc_type, _ in SearchDocument.TYPE_CHOICES]
+        # Benchmark documents get object ids no real object uses
+        first_id = 10 ** 12
+        batch = []
+        for i in range(documents):
+            title = ' '.join(rng.choices(words, cum_weights=weights, k=6))
+            body = ' '.join(rng.choices(words, cum_weights=weights, k=rng.randint(20, 120)))
+            doc_weights = term_weights(title, body)
+            batch.append((SearchDocument(
+                doc_type=doc_types[i % len(doc_types)], object_id=first_id + i,
+                title=title, excerpt=body[:300], url=f'/benchmark/{i}/', length=sum(doc_weights.values()),
+            ), doc_weights))
+            if len(batch) == batch_size:
+                _write_batch(batch)
+                batch = []
+        if batch:
+            _write_batch(batch)
+
+    def time_query(self, query, runs):
+        """Per-run times in ms of what the search view runs: count, facets and the first page"""
+        timings = []
+        for _ in range(runs):
+            started = time.perf_counter()
+            results = SearchQuery(query)
+            count = results.count()
+            results[0:20]
+            timings.append((time.perf_counter() - started) * 1000)
+        if results.truncated:
+            count = f'{count}+'
+        return count, timings
+
+    def percentile(self, timings, pct):
+        ordered = sorted(timings)
+        return ordered[min(len(ordered) - 1, len(ordered) * pct // 100)]
+
+    def summary(self, timings):
+        return f'p50 {self.percentile(timings, 50):.1f}ms, p95 {self.percentile(timings, 95):.1f}ms over {len(timings)} runs'
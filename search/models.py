@@ -0,0 +1,44 @@
+from django.db import models
+
+
+class SearchDocument(models.Model):
+    """One searchable object (course, section, event, project, forum topic or post)"""
+    TYPE_CHOICES = (
+        ('course', 'Courses'),
+        ('section', 'Course Sections'),
+        ('event', 'Events'),
+        ('project', 'Projects'),
+        ('topic', 'Forum Topics'),
+        ('post', 'Forum Posts'),
+    )
+    
+    doc_type = models.CharField(max_length=10, choices=TYPE_CHOICES)
+    object_id = models.PositiveBigIntegerField()
+    title = models.CharField(max_length=255)
+    excerpt = models.CharField(max_length=300, blank=True)
+    url = models.CharField(max_length=500)
+    length = models.PositiveIntegerField(default=0)  # Number of indexed tokens
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        unique_together = ('doc_type', 'object_id')
+    
+    def __str__(self):
+        return f"{self.get_doc_type_display()}: {self.title}"
+
+
+class SearchPosting(models.Model):
+    """Inverted index entry: ``term`` appears in ``document`` with the given weight"""
+    term = models.CharField(max_length=64)
+    document = models.ForeignKey(SearchDocument, on_delete=models.CASCADE, related_name='postings')
+    weight = models.PositiveIntegerField(default=1)
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['term', 'document']),
+            # Capped queries read a term's heaviest postings first
+            models.Index(fields=['term', '-weight']),
+        ]
+    
+    def __str__(self):
+        return f"{self.term} -> {self.document_id}"
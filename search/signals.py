@@ -0,0 +1,77 @@
+from django.db.models.signals import post_init, post_save, post_delete
+from django.dispatch import receiver
+
+from courses.models import Course, Section
+from events.models import Event
+from forums.models import Topic, Post
+from projects.models import Project
+
+from .index import index_object, remove_object
+from .models import SearchDocument
+
+# Course fields that go into its document, and those its sections' documents
+# take from it (title, url, visibility)
+COURSE_FIELDS = {'title', 'slug', 'description', 'content', 'status'}
+SECTION_FIELDS = ('title', 'slug', 'status')
+
+def _course_listing(instance):
+    # Read from __dict__ so instances loaded with only() don't fetch the fields
+    return tuple(instance.__dict__.get(field) for field in SECTION_FIELDS)
+
+@receiver(post_init, sender=Course)
+def remember_course_listing(sender, instance, **kwargs):
+    instance._indexed_listing = _course_listing(instance) if instance.pk else None
+
+@receiver(post_save, sender=Course)
+def index_course(sender, instance, update_fields=None, **kwargs):
+    """Index the course, and its sections when what they show of the course changed"""
+    if update_fields is not None and not COURSE_FIELDS.intersection(update_fields):
+        return
+    index_object('course', instance)
+    listing = _course_listing(instance)
+    if listing != instance._indexed_listing:
+        for section in instance.sections.all():
+            section.course = instance
+            index_object('section', section)
+    instance._indexed_listing = listing
+
+@receiver(post_save, sender=Section)
+def index_section(sender, instance, **kwargs):
+    index_object('section', instance)
+
+@receiver(post_save, sender=Event)
+def index_event(sender, instance, **kwargs):
+    index_object('event', instance)
+
+@receiver(post_save, sender=Project)
+def index_project(sender, instance, **kwargs):
+    index_object('project', instance)
+
+@receiver(post_save, sender=Topic)
+def index_topic(sender, instance, **kwargs):
+    """Index the topic and keep the titles shown for its posts in step"""
+    index_object('topic', instance)
+    SearchDocument.objects.filter(
+        doc_type='post',
+        object_id__in=instance.posts.values('pk'),
+    ).exclude(title=instance.title[:255]).update(title=instance.title[:255])
+
+@receiver(post_save, sender=Post)
+def index_post(sender, instance, update_fields=None, **kwargs):
+    if update_fields is None or 'content' in update_fields:
+        index_object('post', instance)
+
+DOC_TYPES = {
+    Course: 'course',
+    Section: 'section',
+    Event: 'event',
+    Project: 'project',
+    Topic: 'topic',
+    Post: 'post',
+}
+
+def remove_from_index(sender, instance, **kwargs):
+    remove_object(DOC_TYPES[sender], instance.pk)
+
+for model in DOC_TYPES:
+    post_delete.connect(remove_from_index, sender=model, dispatch_uid=f'search_remove_{model.__name__}')
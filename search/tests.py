@@ -0,0 +1,100 @@
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase
+
+from courses.models import Category, Course, Section
+
+from . import index
+from .index import SearchQuery
+from .models import SearchDocument
+from .tokenizer import stem, term_weights, tokenize
+
+
+class TokenizerTests(SimpleTestCase):
+    def test_tokenize(self):
+        self.assertEqual(tokenize('The Workshops on Django, and a CI pipeline!'), ['workshop', 'django', 'ci', 'pipeline'])
+        self.assertEqual(tokenize(''), [])
+        self.assertEqual(tokenize(None), [])
+
+    def test_stem(self):
+        self.assertEqual(stem('libraries'), 'library')
+        self.assertEqual(stem('classes'), 'class')
+        # Too short to strip
+        self.assertEqual(stem('bus'), 'bus')
+
+    def test_title_terms_weigh_more(self):
+        weights = term_weights('Django basics', 'django models and django views')
+        self.assertEqual(weights['django'], 2 + 3)
+        self.assertEqual(weights['basic'], 3)
+        self.assertEqual(term_weights('Django', 'django', title_boost=0)['django'], 1)
+
+
+class IndexTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user('author')
+        self.category = Category.objects.create(name='Category')
+
+    def make_course(self, title, content='Text', status='published'):
+        return Course.objects.create(
+            title=title, author=self.author, category=self.category,
+            description='About', content=content, status=status,
+        )
+
+    def indexed(self, doc_type):
+        return set(SearchDocument.objects.filter(doc_type=doc_type).values_list('object_id', flat=True))
+
+    def test_signals_follow_the_course_status(self):
+        course = self.make_course('Django', status='draft')
+        section = Section.objects.create(course=course, title='Models', content='Fields')
+        self.assertEqual(self.indexed('course'), set())
+        self.assertEqual(self.indexed('section'), set())
+
+        course.status = 'published'
+        course.save()
+        self.assertEqual(self.indexed('course'), {course.pk})
+        self.assertEqual(self.indexed('section'), {section.pk})
+
+        section.delete()
+        course.delete()
+        self.assertFalse(SearchDocument.objects.exists())
+
+    def test_sections_reindexed_only_when_the_course_listing_changes(self):
+        course = self.make_course('Django')
+        Section.objects.create(course=course, title='Models', content='Fields')
+        course = Course.objects.get(pk=course.pk)
+
+        with mock.patch('search.signals.index_object', wraps=index.index_object) as index_object:
+            course.description = 'New description'
+            course.save()
+        self.assertEqual([call.args[0] for call in index_object.call_args_list], ['course'])
+
+        with mock.patch('search.signals.index_object', wraps=index.index_object) as index_object:
+            course.title = 'Flask'
+            course.save()
+        self.assertEqual([call.args[0] for call in index_object.call_args_list], ['course', 'section'])
+        self.assertEqual(SearchDocument.objects.get(doc_type='section').title, 'Flask - Models')
+
+    def test_ranking(self):
+        in_title = self.make_course('Postgres tuning', content='Indexes')
+        in_body = self.make_course('Databases', content='Some postgres tuning notes')
+        self.make_course('Postgres', content='Only one of the terms')
+
+        results = SearchQuery('postgres tuning')
+        self.assertEqual(results.count(), 2)
+        self.assertEqual([document.object_id for document in results[0:10]], [in_title.pk, in_body.pk])
+        self.assertEqual(results.facets, [('course', 'Courses', 2)])
+        self.assertEqual(SearchQuery('postgres tuning', 'event').count(), 0)
+        self.assertEqual(SearchQuery('postgres nosuchword').count(), 0)
+        self.assertFalse(results.truncated)
+
+    def test_common_terms_are_capped(self):
+        courses = [self.make_course(f'Python {i}', content='python ' * i) for i in range(1, 6)]
+        with mock.patch.object(index, 'MAX_CANDIDATES', 3):
+            results = SearchQuery('python')
+            self.assertEqual(results.count(), 3)
+            self.assertTrue(results.truncated)
+            # The documents where the term weighs most are the ones kept
+            self.assertEqual({document.object_id for document in results[0:10]}, {course.pk for course in courses[2:]})
@@ -0,0 +1,40 @@
+import re
+from collections import Counter
+
+WORD_RE = re.compile(r'\w+', re.UNICODE)
+
+STOP_WORDS = frozenset("""
+a an and are as at be but by for from has have how i if in into is it its
+of on or our so that the their then there these this to was we what when
+where which who will with you your
+""".split())
+
+MAX_TERM_LENGTH = 64
+
+
+def stem(word):
+    """Very small suffix stripper so 'workshops'/'workshop' share a term"""
+    for suffix in ('ing', 'ies', 'es', 's'):
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            if suffix == 'ies':
+                return word[:-3] + 'y'
+            return word[:-len(suffix)]
+    return word
+
+
+def tokenize(text):
+    """Split text into normalized search terms"""
+    terms = []
+    for word in WORD_RE.findall((text or '').lower()):
+        if len(word) < 2 or word in STOP_WORDS:
+            continue
+        terms.append(stem(word)[:MAX_TERM_LENGTH])
+    return terms
+
+
+def term_weights(title, body, title_boost=3):
+    """Term -> weight for a document, counting title terms ``title_boost`` times"""
+    weights = Counter(tokenize(body))
+    for term in tokenize(title):
+        weights[term] += title_boost
+    return weights
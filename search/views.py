@@ -0,0 +1,50 @@
+from django.core.paginator import Paginator
+from django.http import JsonResponse
+from django.shortcuts import render
+
+from .index import SearchQuery
+from .models import SearchDocument
+
+
+def search(request):
+    """Ranked search across courses, events, projects and the forums"""
+    query = request.GET.get('q', '').strip()
+    doc_type = request.GET.get('type', '')
+    if doc_type not in dict(SearchDocument.TYPE_CHOICES):
+        doc_type = ''
+    
+    results = SearchQuery(query, doc_type or None)
+    paginator = Paginator(results, 20)
+    page_obj = paginator.get_page(request.GET.get('page'))
+    
+    if request.GET.get('format') == 'json':
+        return JsonResponse({
+            'query': query,
+            'type': doc_type,
+            'count': paginator.count,
+            'truncated': results.truncated,
+            'page': page_obj.number,
+            'num_pages': paginator.num_pages,
+            'facets': [
+                {'type': facet_type, 'label': label, 'count': count}
+                for facet_type, label, count in results.facets
+            ],
+            'results': [
+                {
+                    'type': document.doc_type,
+                    'title': document.title,
+                    'excerpt': document.excerpt,
+                    'url': document.url,
+                    'score': round(document.score, 4),
+                }
+                for document in page_obj
+            ],
+        })
+    
+    context = {
+        'query': query,
+        'current_type': doc_type,
+        'facets': results.facets,
+        'page_obj': page_obj,
+    }
+    return render(request, 'search/results.html', context)